@@ -14,7 +14,78 @@ Discord Webhook にメンションを自動付与して通知するフルコー
 import os
 import json
 import time
-from typing import Any, Dict, Optional, Tuple
+import datetime
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+try:
+    import orjson  # Rust 実装で json.dumps より速い（無ければ標準 json）
+except Exception:
+    orjson = None
+
+# monitor.py から使う公開面はこの 2 つだけ
+__all__ = ["DiscordWebhookClient", "send_aggregate_lines"]
+
+# Discord の webhook は 5req/2s 制限があるため同時送信数を絞る
+_POST_SEMAPHORE = threading.Semaphore(5)
+
+# "1" で成功ログにレスポンスボディを含める（既定は抑制）
+DISCORD_VERBOSE = os.getenv("DISCORD_VERBOSE", "0").strip() == "1"
+
+
+class _RateLimiter:
+    """Webhook 単位のトークンバケット（Discord: 5 リクエスト / 2 秒）。
+
+    送信前に acquire() で枠を取り、レスポンスヘッダの
+    X-RateLimit-Remaining / X-RateLimit-Reset-After で残量を反映する。
+    429 を踏んでから sleep するのではなく、事前にペーシングする。
+    """
+
+    def __init__(self, capacity: int = 5, window_sec: float = 2.0):
+        self.capacity = capacity
+        self.window_sec = window_sec
+        self._cond = threading.Condition()
+        self._stamps: List[float] = []  # 直近 window 内の送信時刻
+        self._blocked_until = 0.0
+
+    def acquire(self) -> None:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._stamps = [t for t in self._stamps if now - t < self.window_sec]
+                if now >= self._blocked_until and len(self._stamps) < self.capacity:
+                    self._stamps.append(now)
+                    return
+                wait = self._blocked_until - now
+                if self._stamps:
+                    wait = max(wait, self._stamps[0] + self.window_sec - now)
+                self._cond.wait(timeout=max(0.05, wait))
+
+    def update(self, remaining: Optional[str], reset_after: Optional[str]) -> None:
+        try:
+            if remaining is not None and reset_after is not None and int(remaining) <= 0:
+                with self._cond:
+                    until = time.monotonic() + float(reset_after)
+                    self._blocked_until = max(self._blocked_until, until)
+                    self._cond.notify_all()
+        except Exception:
+            pass
+
+
+_RATE_LIMITERS: Dict[str, _RateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+def _get_rate_limiter(webhook_url: str) -> _RateLimiter:
+    with _RATE_LIMITERS_LOCK:
+        limiter = _RATE_LIMITERS.get(webhook_url)
+        if limiter is None:
+            limiter = _RateLimiter()
+            _RATE_LIMITERS[webhook_url] = limiter
+        return limiter
 
 # ========== ヘルパー：メンションと allowed_mentions を生成 ==========
 def _build_mention_and_allowed() -> Tuple[str, Dict[str, Any]]:
@@ -55,27 +126,39 @@ def _build_mention_and_allowed() -> Tuple[str, Dict[str, Any]]:
 DISCORD_CONTENT_LIMIT = 2000
 DISCORD_EMBED_DESC_LIMIT = 4096
 
+# 固定オフセットで十分（JST に夏時間はない）。pytz 不要
+_JST = datetime.timezone(datetime.timedelta(hours=9), "JST")
+
+def _jst_now() -> datetime.datetime:
+    return datetime.datetime.now(_JST)
+
 def _split_content(s: str, limit: int = DISCORD_CONTENT_LIMIT):
+    # 整数オフセットで一度だけ走査する（末尾コピーの繰り返しを避ける）
     pages = []
-    cur = (s or "").strip()
-    while len(cur) > limit:
-        cut = cur.rfind("\n", 0, limit)
-        if cut < 0:
-            cut = cur.rfind(" ", 0, limit)
-        if cut < 0:
-            cut = limit
-        pages.append(cur[:cut].rstrip())
-        cur = cur[cut:].lstrip()
-    if cur:
-        pages.append(cur)
+    s = (s or "").strip()
+    n = len(s)
+    start = 0
+    while n - start > limit:
+        end = start + limit
+        cut = s.rfind("\n", start, end)
+        if cut <= start:
+            cut = s.rfind(" ", start, end)
+        if cut <= start:
+            cut = end
+        page = s[start:cut].rstrip()
+        if page:
+            pages.append(page)
+        start = cut
+        while start < n and s[start].isspace():
+            start += 1
+    if start < n:
+        pages.append(s[start:])
     return pages
 
 def _truncate_embed_description(desc: str) -> str:
     if desc is None:
         return ""
-    if len(desc) <= DISCORD_EMBED_DESC_LIMIT:
-        return desc
-    return desc[:DISCORD_EMBED_DESC_LIMIT - 3] + "..."
+    return desc if len(desc) <= DISCORD_EMBED_DESC_LIMIT else desc[:DISCORD_EMBED_DESC_LIMIT - 3] + "..."
 
 
 # ========== Webhook クライアント ==========
@@ -94,52 +177,57 @@ class DiscordWebhookClient:
         self.thread_id = thread_id
         self.wait = wait
         self.timeout_sec = timeout_sec
-        self.user_agent = user_agent or "facility-monitor/mention/1.0 (+python-urllib)"
+        self.user_agent = user_agent or "facility-monitor/mention/1.0 (+python-requests)"
+        # keep-alive で TLS ハンドシェイクを使い回す（ページ分割送信時に効く）
+        self._session = requests.Session()
+        self._session.headers.update({
+            "Content-Type": "application/json",
+            "User-Agent": self.user_agent,
+        })
+        # メンション/allowed_mentions とクエリ文字列は送信のたびに変わらないので
+        # 構築時に一度だけ決める
+        self._mention, self._allowed = _build_mention_and_allowed()
+        self._mention_prefix = f"{self._mention} " if self._mention else ""
+        params = []
+        if self.wait:
+            params.append("wait=true")
+        if self.thread_id:
+            params.append(f"thread_id={self.thread_id}")
+        self._query = f"?{'&'.join(params)}" if params else ""
 
     @staticmethod
-    def from_env() -> "DiscordWebhookClient":
-        url = os.getenv("DISCORD_WEBHOOK_URL", "").strip()
+    def from_env(webhook_url: Optional[str] = None) -> "DiscordWebhookClient":
+        url = webhook_url or os.getenv("DISCORD_WEBHOOK_URL", "").strip()
         th = os.getenv("DISCORD_THREAD_ID", "").strip() or None
         wt = os.getenv("DISCORD_WAIT", "1").strip() == "1"
         ua = os.getenv("DISCORD_USER_AGENT", "").strip() or None
-        return DiscordWebhookClient(webhook_url=url, thread_id=th, wait=wt, user_agent=ua)
+        return _cached_client(url, th, wt, ua)
 
     def _post(self, payload: Dict[str, Any]) -> Tuple[int, str, Dict[str, Any]]:
-        import urllib.request, urllib.error, ssl
-        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        # timestamp は事前に文字列化済みなので orjson でそのまま直列化できる
+        if orjson is not None:
+            data = orjson.dumps(payload)
+        else:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
 
-        url = self.webhook_url
-        params = []
-        if self.wait:
-            params.append("wait=true")
-        if self.thread_id:
-            params.append(f"thread_id={self.thread_id}")
-        if params:
-            url = f"{url}?{'&'.join(params)}"
-
-        req = urllib.request.Request(
-            url=url,
-            data=data,
-            headers={"Content-Type": "application/json", "User-Agent": self.user_agent},
-        )
-        ctx = ssl.create_default_context()
+        url = self.webhook_url + self._query
+        limiter = _get_rate_limiter(self.webhook_url)
         tries = 0
         max_tries = 3
         while True:
             tries += 1
             try:
-                with urllib.request.urlopen(req, context=ctx, timeout=self.timeout_sec) as resp:
-                    body = resp.read().decode("utf-8", errors="ignore")
-                    status = getattr(resp, "status", 200)
-                    headers = dict(resp.headers) if resp.headers else {}
-                    return status, body, headers
-            except urllib.error.HTTPError as e:
-                status = e.code
-                try:
-                    body = e.read().decode("utf-8", errors="ignore")
-                except Exception:
+                limiter.acquire()
+                resp = self._session.post(url, data=data, timeout=self.timeout_sec, stream=True)
+                status = resp.status_code
+                headers = dict(resp.headers)
+                # 204 / 空レスポンスはボディを読まない（ログにしか使われない）
+                if status == 204 or headers.get("Content-Length") == "0":
                     body = ""
-                headers = dict(e.headers) if e.headers else {}
+                    resp.close()
+                else:
+                    body = resp.text
+                limiter.update(headers.get("X-RateLimit-Remaining"), headers.get("X-RateLimit-Reset-After"))
                 if status == 429 and tries < max_tries:
                     retry_after = float(headers.get("Retry-After", "1.0"))
                     print(f"[WARN] Discord 429: retry_after={retry_after}s; body={body}", flush=True)
@@ -149,40 +237,119 @@ class DiscordWebhookClient:
             except Exception as e:
                 return -1, f"Exception: {e}", {}
 
+    def _post_limited(self, payload: Dict[str, Any]) -> Tuple[int, str, Dict[str, Any]]:
+        with _POST_SEMAPHORE:
+            return self._post(payload)
+
     def send_text(self, content: str) -> bool:
-        mention, allowed = _build_mention_and_allowed()
+        allowed = self._allowed
+        prefix = self._mention_prefix  # 構築時に確定済み（ページごとの strip を省く）
         pages = _split_content(content or "", limit=DISCORD_CONTENT_LIMIT)
+        payloads = [{"content": prefix + page, **allowed} for page in pages]
+        # 複数ページは並行送信して RTT を重ねない（結果は元の順序で確認）
+        if len(payloads) > 1:
+            with ThreadPoolExecutor(max_workers=min(5, len(payloads))) as ex:
+                results = list(ex.map(self._post_limited, payloads))
+        else:
+            results = [self._post(p) for p in payloads]
         ok_all = True
-        for i, page in enumerate(pages, 1):
-            page_with_mention = f"{mention} {page}".strip() if mention else page
-            payload = {"content": page_with_mention, **allowed}
-            status, body, headers = self._post(payload)
+        for i, ((status, body, headers), payload) in enumerate(zip(results, payloads), 1):
             if status in (200, 204):
-                print(f"[INFO] Discord notified (text p{i}/{len(pages)}): {len(page_with_mention)} chars body={body}", flush=True)
+                suffix = f" body={body}" if DISCORD_VERBOSE else ""
+                print(f"[INFO] Discord notified (text p{i}/{len(pages)}): {len(payload['content'])} chars{suffix}", flush=True)
             else:
                 ok_all = False
                 print(f"[ERROR] Discord text failed (p{i}/{len(pages)}): HTTP {status} body={body}", flush=True)
         return ok_all
 
     def send_embed(self, title: str, description: str, color: int = 0x00B894, footer_text: str = "Facility monitor") -> bool:
-        mention, allowed = _build_mention_and_allowed()
+        mention, allowed = self._mention, self._allowed
+        one_line = (description or "").splitlines()[0] if description else ""
+        content = f"{mention} **{title}** — {one_line}".strip() if (mention or one_line or title) else ""
         embed = {
             "title": title,
             "description": _truncate_embed_description(description or ""),
             "color": color,
-            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+09:00"),  # JSTの簡易表記
+            "timestamp": _jst_now().isoformat(),
             "footer": {"text": footer_text},
         }
-        payload = {"content": mention if mention else "", "embeds": [embed], **allowed}
+        payload = {"content": content, "embeds": [embed], **allowed}
+        if DISCORD_VERBOSE:
+            print("[DEBUG] payload preview:", json.dumps(payload, ensure_ascii=False), flush=True)
         status, body, headers = self._post(payload)
         if status in (200, 204):
-            print(f"[INFO] Discord notified (embed): title='{title}' len={len(description or '')} body={body}", flush=True)
+            suffix = f" body={body}" if DISCORD_VERBOSE else ""
+            print(f"[INFO] Discord notified (embed): title='{title}' len={len(description or '')}{suffix}", flush=True)
             return True
         print(f"[WARN] Embed failed: HTTP {status}; body={body}. Falling back to plain text.", flush=True)
         text = f"**{title}**\n{description or ''}"
         return self.send_text(text)
 
 
+# ========== 集計通知（monitor.py から利用） ==========
+# 施設ごとの色（通知 embed 用）
+_FACILITY_ALIAS_COLOR_HEX = {
+    "南浦和": "0x3498DB",  # Blue
+    "岩槻": "0x2ECC71",    # Green
+    "鈴谷": "0xF1C40F",    # Yellow
+    "岸町": "0xE74C3C",    # Red
+    "駒場": "0x8E44AD",    # Purple-ish
+}
+_DEFAULT_COLOR_HEX = "0x00B894"
+def _hex_to_int(hex_str: str) -> int:
+    try:
+        return int(hex_str, 16)
+    except Exception:
+        return int(_DEFAULT_COLOR_HEX, 16)
+
+# 同一パラメータのクライアントを使い回す（Session の接続を run 全体で再利用）
+@functools.lru_cache(maxsize=8)
+def _cached_client(url: str, thread_id: Optional[str], wait: bool,
+                   user_agent: Optional[str]) -> "DiscordWebhookClient":
+    return DiscordWebhookClient(webhook_url=url, thread_id=thread_id, wait=wait, user_agent=user_agent)
+
+
+def _get_webhook_client(webhook_url: str) -> "DiscordWebhookClient":
+    return DiscordWebhookClient.from_env(webhook_url)
+
+
+def send_aggregate_lines(webhook_url: Optional[str], facility_alias: str, month_text: str, lines: List[str]) -> None:
+    if not webhook_url or not lines:
+        return
+
+    # 既存の設定（テキスト強制・行数制限）
+    force_text = (os.getenv("DISCORD_FORCE_TEXT", "0").strip() == "1")
+    max_lines_env = os.getenv("DISCORD_MAX_LINES", "").strip()
+    max_lines = None
+    try:
+        if max_lines_env:
+            max_lines = max(1, int(max_lines_env))
+    except Exception:
+        max_lines = None
+    if max_lines is not None and len(lines) > max_lines:
+        lines = lines[:max_lines] + [f"... ほか {len(lines) - max_lines} 件"]
+
+    # 件名・本文の組み立て（従来どおり）
+    title = f"{facility_alias}"
+    description = "\n".join(lines)
+
+    # 色（embed用）
+    color_hex = _FACILITY_ALIAS_COLOR_HEX.get(facility_alias, _DEFAULT_COLOR_HEX)
+    color_int = _hex_to_int(color_hex)
+
+    # Webhookクライアント（URL単位でキャッシュし接続を再利用）
+    client = _get_webhook_client(webhook_url)
+
+    # 強制テキスト送信（embedを使わない運用時）
+    # メンションと allowed_mentions は send_text 側で付与される
+    if force_text:
+        client.send_text(f"**{title}**\n{description}")
+        return
+
+    # embed送信（client.send_embed が mention＋allowed を扱う）
+    client.send_embed(title=title, description=description, color=color_int, footer_text="Facility monitor")
+
+
 # ========== サンプル main（動作確認用） ==========
 def main():
     # ここは最小限の動作確認。環境変数で設定してください。
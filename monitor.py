@@ -11,21 +11,29 @@ import sys
 import json
 import re
 import datetime
+import zoneinfo
+import hashlib
 import time
+import threading
 from contextlib import contextmanager
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple, Dict, Any, List
 from playwright.sync_api import sync_playwright
 
 # ====== 環境 ======
-try:
-    import pytz
-except Exception:
-    pytz = None
 try:
     import jpholiday  # 祝日判定（任意）
 except Exception:
     jpholiday = None
+try:
+    import orjson  # Rust 実装で json.dumps より速い（無ければ標準 json）
+except Exception:
+    orjson = None
+try:
+    from selectolax.lexbor import LexborHTMLParser  # C 実装の HTML パーサ（無ければ正規表現）
+except Exception:
+    LexborHTMLParser = None
 BASE_URL = os.getenv("BASE_URL")
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "").strip()
 MONITOR_FORCE = os.getenv("MONITOR_FORCE", "0").strip() == "1"
@@ -33,6 +41,14 @@ MONITOR_START_HOUR = int(os.getenv("MONITOR_START_HOUR", "5"))
 MONITOR_END_HOUR = int(os.getenv("MONITOR_END_HOUR", "23"))
 TIMING_VERBOSE = os.getenv("TIMING_VERBOSE", "0").strip() == "1"
 FAST_ROUTES = os.getenv("FAST_ROUTES", "0").strip() == "1"  # フォント/解析ブロック
+try:
+    MONITOR_PARALLEL = max(1, int(os.getenv("MONITOR_PARALLEL", "1")))  # 施設並列数
+except Exception:
+    MONITOR_PARALLEL = 1
+STORAGE_STATE_PATH = os.getenv("STORAGE_STATE_PATH", "").strip()  # cookie/localStorage を run 間で再利用
+SNAPSHOT_JPEG = os.getenv("SNAPSHOT_JPEG", "0").strip() == "1"  # "1" で PNG の代わりに JPEG(q80) 保存
+ALWAYS_SNAPSHOT = os.getenv("ALWAYS_SNAPSHOT", "0").strip() == "1"  # "1" で変化なしでも毎回撮影
+CAPTURE_LOG = os.getenv("CAPTURE_LOG", "").strip()  # 取得結果の JSONL 追記先（空なら無効）
 GRACE_MS_DEFAULT = 1000
 try:
     GRACE_MS = max(0, int(os.getenv("GRACE_MS", str(GRACE_MS_DEFAULT))))
@@ -81,6 +97,68 @@ FACILITY_TIME_MAP = {
 }
 
 # ====== ユーティリティ ======
+# ホットループで使う正規表現はモジュールロード時に一度だけコンパイルする
+YM_HEAD_RE = re.compile(r"(\d{4})年(\d{1,2})月")
+DAY_ANY_RE = re.compile(r"([1-9]\d?|1\d|2\d|3[01])\s*日")
+_SAFE_NAME_RE = re.compile(r"[\\/:*?\"<>\n]+")
+_TD_RE = re.compile(r"<td\b([^>]*)>(.*?)</td>", re.IGNORECASE | re.DOTALL)
+_TD_ATTRS_RE = re.compile(r'\b(class|title|aria-label)\s*=\s*"([^"]*)"', re.IGNORECASE)
+_IMG_RE = re.compile(r"<img\b([^>]*)>", re.IGNORECASE)
+_IMG_ATTRS_RE = re.compile(r'\b(alt|title|src)\s*=\s*"([^"]*)"', re.IGNORECASE)
+_STRIP_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+_MOVECAL_HREF_RE = re.compile(r"moveCalender\([^,]+,[^,]+,\s*(\d{8})\)")
+_JS_HREF_RE = re.compile(r"\s*javascript:\s*(.+)$")
+_YYYYMMDD_RE = re.compile(r"\d{8}")
+_TIME_RANGE_RE = re.compile(r"(\d{1,2})\D+(\d{1,2})")
+_Z2H_TBL = str.maketrans("０１２３４５６７８９　", "0123456789 ")
+
+# カレンダーセル判定用セレクタ。grace_pause / wait_calendar_ready で共用する
+_CELL_SELECTOR = "[role='gridcell'], table.reservation-calendar tbody td, .fc-daygrid-day, .calendar-day"
+_CELLS_READY_JS = f"() => document.querySelectorAll(\"{_CELL_SELECTOR}\").length >= 28"
+
+# 取得イベントはメモリに溜めて run 終了時に 1 回のバッファ付き追記で書く
+_CAPTURE_BUF: List[str] = []
+_CAPTURE_LOCK = threading.Lock()
+
+def _log_capture(facility_name: str, month_text: str, summary: Dict[str, int]) -> None:
+    if not CAPTURE_LOG:
+        return
+    line = _json_dumps_compact({
+        "at": jst_now().strftime("%Y-%m-%d %H:%M:%S"),
+        "facility": facility_name, "month": month_text, "summary": summary,
+    })
+    with _CAPTURE_LOCK:
+        _CAPTURE_BUF.append(line)
+
+def _flush_capture_log() -> None:
+    if not CAPTURE_LOG:
+        return
+    with _CAPTURE_LOCK:
+        lines, _CAPTURE_BUF[:] = list(_CAPTURE_BUF), []
+    if not lines:
+        return
+    try:
+        path = Path(CAPTURE_LOG)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "ab", buffering=1 << 16) as f:
+            f.write(("\n".join(lines) + "\n").encode("utf-8"))
+    except Exception as e:
+        print(f"[WARN] capture log append failed: {e}", flush=True)
+
+# スクレイプ専用ブラウザに不要な機能を切って起動・常駐コストを下げる
+_LAUNCH_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-default-apps",
+    "--disable-extensions",
+    "--disable-features=Translate,BackForwardCache",
+]
+
+# スナップショット書き込み用の背景 IO プール（ブラウザ操作と並行させる）
+_IO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="snapshot-io")
+
 @contextmanager
 def time_section(title: str):
     start = time.perf_counter()
@@ -91,11 +169,11 @@ def time_section(title: str):
         end = time.perf_counter()
         print(f"[TIMER] {title}: end ({end - start:.3f}s)", flush=True)
 
+# タイムゾーンは標準ライブラリ zoneinfo（C 実装）で一度だけ作る
+_JST = zoneinfo.ZoneInfo("Asia/Tokyo")
+
 def jst_now() -> datetime.datetime:
-    if pytz is None:
-        return datetime.datetime.now()
-    jst = pytz.timezone("Asia/Tokyo")
-    return datetime.datetime.now(jst)
+    return datetime.datetime.now(_JST)
 
 def is_within_monitoring_window(start_hour=5, end_hour=23):
     try:
@@ -116,11 +194,31 @@ def ensure_root_dir(root: Path) -> None:
 def safe_mkdir(d: Path):
     d.mkdir(parents=True, exist_ok=True)
 
-def safe_write_text(p: Path, s: str):
+def safe_write_text(p: Path, s: str, atomic: bool = True):
+    # atomic=False は途中書きを読まれても困らない監視用ファイル
+    # （status_counts.json など）向け。tmp 作成と rename の 2 syscall を省く
     p.parent.mkdir(parents=True, exist_ok=True)
-    tmp = p.with_suffix(p.suffix + ".tmp")
-    tmp.write_text(s, "utf-8")
-    tmp.replace(p)
+    target = p.with_suffix(p.suffix + ".tmp") if atomic else p
+    # 先にエンコードしてバッファ付きバイナリ書き込みにする（write 系 syscall を削減）
+    with open(target, "wb", buffering=1 << 16) as f:
+        f.write(s.encode("utf-8"))
+    if atomic:
+        target.replace(p)
+
+def _json_loads_bytes(b: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(b)
+    return json.loads(b.decode("utf-8"))
+
+def _json_dumps_pretty(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+def _json_dumps_compact(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
 
 def safe_element_screenshot(el, out: Path):
     out.parent.mkdir(parents=True, exist_ok=True)
@@ -128,24 +226,44 @@ def safe_element_screenshot(el, out: Path):
     el.screenshot(path=str(out))
 
 # ====== コンフィグ ======
+# パース済みコンフィグを mtime キーでキャッシュ（常駐運用時の再パースを回避）
+_CONFIG_CACHE: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
 def load_config() -> Dict[str, Any]:
-    text = CONFIG_PATH.read_text("utf-8")
-    cfg = json.loads(text)
+    path = CONFIG_PATH
+    mtime_ns = None
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except Exception:
+        pass
+    cached = _CONFIG_CACHE.get(str(path))
+    if cached is not None and mtime_ns is not None and cached[0] == mtime_ns:
+        return cached[1]
+    cfg = _json_loads_bytes(path.read_bytes())
     for key in ["facilities", "status_patterns", "css_class_patterns"]:
         if key not in cfg:
             raise RuntimeError(f"config.json の '{key}' が不足しています")
+    if mtime_ns is not None:
+        _CONFIG_CACHE[str(path)] = (mtime_ns, cfg)
     return cfg
 
 # ====== 不要リソースブロック（任意） ======
-def enable_fast_routes(page):
-    block_exts = (".woff", ".woff2", ".ttf")
-    block_hosts = ("www.google-analytics.com", "googletagmanager.com")
+# 画像とCSSはスクリーンショットの見た目とステータス画像判定に関わるため残す
+_BLOCK_RESOURCE_TYPES = {"font", "media"}
+_BLOCK_EXTS = (".woff", ".woff2", ".ttf")
+_BLOCK_HOSTS = ("www.google-analytics.com", "googletagmanager.com", "doubleclick.net")
+
+def enable_fast_routes(target):
+    """不要リソースのブロック。page ではなく context に付けて登録を 1 回にする。"""
     def handler(route):
-        url = route.request.url
-        if url.endswith(block_exts) or any(h in url for h in block_hosts):
+        req = route.request
+        if req.resource_type in _BLOCK_RESOURCE_TYPES:
+            return route.abort()
+        url = req.url
+        if url.endswith(_BLOCK_EXTS) or any(h in url for h in _BLOCK_HOSTS):
             return route.abort()
         return route.continue_()
-    page.route("**/*", handler)
+    target.route("**/*", handler)
 
 # ====== 保険待機 ======
 def grace_pause(page, label: str = "grace wait"):
@@ -153,51 +271,79 @@ def grace_pause(page, label: str = "grace wait"):
     if ms_cap <= 0:
         return
     with time_section(f"{label} (adaptive, <= {ms_cap}ms)"):
-        step = 200
-        spent = 0
-        page.wait_for_timeout(step); spent += step
+        # Python 側の 200ms 刻みポーリング（count() 往復 × 最大 5 回）をやめ、
+        # ブラウザ側で判定する wait_for_function 1 回に置き換える。
+        # 速く描画されるページでは ~200ms の固定待ちがほぼゼロになる
+        start = time.monotonic()
         try:
-            while spent < ms_cap:
-                cells = page.locator("[role='gridcell'], table.reservation-calendar tbody td, .fc-daygrid-day, .calendar-day")
-                if cells.count() >= 28:
-                    break
-                remaining = ms_cap - spent
-                wait_ms = step if remaining >= step else remaining
-                if wait_ms <= 0:
+            page.wait_for_function(_CELLS_READY_JS, timeout=ms_cap)
+            return
+        except Exception:
+            pass
+        # wait_for_function が使えない/間に合わない場合だけ短い逓増バックオフで粘る。
+        # 予算は wait_for_function と共有し、合計で ms_cap を超えない
+        spent = int((time.monotonic() - start) * 1000)
+        try:
+            cells = page.locator(_CELL_SELECTOR)
+            for delay in (25, 40, 60, 90, 135, 200, 300):
+                if spent >= ms_cap:
                     break
+                wait_ms = min(delay, ms_cap - spent)
                 page.wait_for_timeout(wait_ms)
                 spent += wait_ms
+                if cells.count() >= 28:
+                    break
         except Exception:
             pass
 
 # ====== Playwright 操作 ======
 def try_click_text(page, label: str, timeout_ms: int = 5000, quiet=True) -> bool:
-    locators = [
-        page.get_by_role("link", name=label, exact=True),
-        page.get_by_role("button", name=label, exact=True),
-        page.get_by_text(label, exact=True),
-        page.locator(f"text={label}"),
-    ]
-    for locator in locators:
+    # 4 つのロケータを直列に wait_for すると、外したものごとに timeout_ms を
+    # まるごと消費する。or_ で 1 ロケータに束ねて待ちは 1 回にする
+    locator = (page.get_by_role("link", name=label, exact=True)
+               .or_(page.get_by_role("button", name=label, exact=True))
+               .or_(page.get_by_text(label, exact=True))).first
+    # click() 自体が表示待ちを内包するため、前段の wait_for は冗長。
+    # まず短いタイムアウトで試し、外れたときだけ残り時間で粘る
+    # （要素がすぐ出る通常ケースは速いまま、無いケースの失敗を早める）
+    first_ms = min(500, timeout_ms)
+    for attempt_ms in (first_ms, timeout_ms - first_ms):
+        if attempt_ms <= 0:
+            continue
         try:
             if TIMING_VERBOSE:
-                with time_section(f"click '{label}' (wait+click)"):
-                    locator.wait_for(timeout=timeout_ms)
-                    locator.scroll_into_view_if_needed()
-                    locator.click(timeout=timeout_ms)
+                with time_section(f"click '{label}' (timeout={attempt_ms}ms)"):
+                    locator.click(timeout=attempt_ms)
             else:
-                locator.wait_for(timeout=timeout_ms)
-                locator.scroll_into_view_if_needed()
-                locator.click(timeout=timeout_ms)
+                locator.click(timeout=attempt_ms)
             return True
         except Exception as e:
             if not quiet:
                 print(f"[WARN] try_click_text: {e} (label='{label}')", flush=True)
-            continue
     return False
 
 OPTIONAL_DIALOG_LABELS = ["同意する", "OK", "確認", "閉じる"]
+
 def click_optional_dialogs_fast(page) -> None:
+    # ラベル照合とクリックをページ内の 1 回の evaluate で済ませる
+    # （ダイアログ無しの通常ケースが往復 1 回で確定する）
+    js = """(labels) => {
+        const set = new Set(labels);
+        for (const el of document.querySelectorAll("a, button, [role='button'], [role='link']")) {
+            const t = (el.textContent || "").trim();
+            if (set.has(t)) { el.click(); return t; }
+        }
+        return null;
+    }"""
+    with time_section("optional-dialog scan"):
+        try:
+            hit = page.evaluate(js, OPTIONAL_DIALOG_LABELS)
+            if hit:
+                print(f"[INFO] optional dialog dismissed: {hit}", flush=True)
+            return
+        except Exception as e:
+            print(f"[WARN] optional-dialog scan failed: {e}", flush=True)
+    # evaluate が使えなかったときだけ従来のロケータ探索に落とす
     for label in OPTIONAL_DIALOG_LABELS:
         with time_section(f"optional-dialog: '{label}'"):
             clicked = False
@@ -212,7 +358,6 @@ def click_optional_dialogs_fast(page) -> None:
                     c = probe.count()
                     if c > 0:
                         try:
-                            probe.first.scroll_into_view_if_needed()
                             probe.first.click(timeout=500)
                             clicked = True
                             break
@@ -224,7 +369,6 @@ def click_optional_dialogs_fast(page) -> None:
                 try:
                     cand = page.locator(f"a:has-text('{label}')").first
                     if cand.count() > 0:
-                        cand.scroll_into_view_if_needed()
                         cand.click(timeout=300)
                         clicked = True
                 except Exception:
@@ -238,17 +382,22 @@ HINTS: Dict[str, str] = {
     "バドミントン": ".tcontent",
 }
 def wait_next_step_ready(page, css_hint: Optional[str] = None) -> None:
-    deadline = time.perf_counter() + 0.9
+    # 120ms 刻みのポーリングではなくイベント駆動で待つ。
+    # 遷移で実行コンテキストが壊れた場合も「URL が変わった＝次へ進める」なので
+    # 例外はそのまま成功扱いにする
     last_url = page.url
-    while time.perf_counter() < deadline:
-        try:
-            if page.url != last_url:
-                return
-            if css_hint and page.locator(css_hint).count() > 0:
-                return
-        except Exception:
-            pass
-        page.wait_for_timeout(120)
+    try:
+        page.wait_for_function(
+            """(args) => {
+                const [u, hint] = args;
+                if (location.href !== u) return true;
+                if (hint && document.querySelector(hint)) return true;
+                return false;
+            }""",
+            arg=[last_url, css_hint or ""], timeout=900,
+        )
+    except Exception:
+        pass
 
 def _run_pre_actions(page, actions: List[str]):
     if not actions:
@@ -279,7 +428,6 @@ def _try_click_with_special_selector(page, facility: Dict[str, Any], label: str)
         try:
             el = page.locator(sel).first
             if el and el.count() > 0:
-                el.scroll_into_view_if_needed()
                 el.click(timeout=2000)
                 return True
         except Exception:
@@ -303,13 +451,15 @@ def click_sequence_fast(page, labels: List[str], facility: Dict[str, Any] = None
 
 # ====== ナビゲーション ======
 def navigate_to_facility(page, facility: Dict[str, Any]) -> None:
-    page.goto(BASE_URL, wait_until="domcontentloaded", timeout=30000)
-    if FAST_ROUTES:
-        enable_fast_routes(page)
+    # config に direct_url があればトップからのクリック遷移を丸ごと飛ばす
+    # （カレンダー自体は javascript:moveCalender() なので Playwright のまま）
+    direct_url = (facility.get("direct_url") or "").strip()
+    page.goto(direct_url or BASE_URL, wait_until="domcontentloaded", timeout=30000)
     page.add_style_tag(content="*{animation-duration:0s !important; transition-duration:0s !important;}")
     page.set_default_timeout(5000)
     click_optional_dialogs_fast(page)
-    click_sequence_fast(page, facility.get("click_sequence", []), facility)
+    if not direct_url:
+        click_sequence_fast(page, facility.get("click_sequence", []), facility)
     # post-step（部屋選択など）
     if facility.get("post_facility_click_steps"):
         apply_post_facility_steps(page, facility)
@@ -318,17 +468,13 @@ def navigate_to_facility(page, facility: Dict[str, Any]) -> None:
 # ====== カレンダー準備 ======
 def wait_calendar_ready(page, facility: Dict[str, Any]) -> None:
     with time_section("wait calendar root ready"):
-        deadline = time.perf_counter() + 1.5
-        while time.perf_counter() < deadline:
-            try:
-                cells = page.locator(
-                    "[role='gridcell'], table.reservation-calendar tbody td, .fc-daygrid-day, .calendar-day"
-                )
-                if cells.count() >= 28:
-                    return
-            except Exception:
-                pass
-            page.wait_for_timeout(150)
+        # 150ms 刻みの count() ポーリングをやめて、セルが出そろった瞬間に
+        # 返るイベント駆動の待ちにする（networkidle は使わない）
+        try:
+            page.wait_for_function(_CELLS_READY_JS, timeout=1500)
+            return
+        except Exception:
+            pass
     sel_cfg = facility.get("calendar_selector") or "table.m_akitablelist"
     try:
         page.locator(sel_cfg).first.wait_for(state="visible", timeout=300)
@@ -344,38 +490,32 @@ def wait_calendar_ready(page, facility: Dict[str, Any]) -> None:
 
 # ====== 月テキスト＆ルート ======
 def get_current_year_month_text(page, calendar_root=None) -> Optional[str]:
-    pat = re.compile(r"(\d{4})\s*年\s*(\d{1,2})\s*月")
-    targets: List[str] = []
-    if calendar_root is None:
-        locs = [
-            page.locator("table.m_akitablelist").first,
-            page.locator("[role='grid']").first,
-        ]
-        for loc in locs:
-            try:
-                if loc and loc.count() > 0:
-                    calendar_root = loc
-                    break
-            except Exception:
-                continue
+    # body 全文を CDP 越しに受け取って Python 側で検索するのではなく、
+    # ページ内で正規表現を走らせて一致した月テキストだけを返してもらう
+    scope_js = """(el) => {
+        const m = ((el || document.body).innerText || "").match(/(\\d{4})\\s*年\\s*(\\d{1,2})\\s*月/);
+        return m ? (m[1] + "年" + parseInt(m[2], 10) + "月") : null;
+    }"""
     if calendar_root is not None:
         try:
-            targets.append(calendar_root.inner_text())
-        except Exception:
-            pass
-    if not targets:
-        try:
-            targets.append(page.inner_text("body"))
+            return calendar_root.evaluate(scope_js)
         except Exception:
             pass
-    for txt in targets:
-        if not txt:
-            continue
-        m = pat.search(txt)
-        if m:
-            y, mo = int(m.group(1)), int(m.group(2))
-            return f"{y}年{mo}月"
-    return None
+    page_js = """() => {
+        const scopes = [document.querySelector("table.m_akitablelist"),
+                        document.querySelector("[role='grid']"),
+                        document.body];
+        for (const el of scopes) {
+            if (!el) continue;
+            const m = (el.innerText || "").match(/(\\d{4})\\s*年\\s*(\\d{1,2})\\s*月/);
+            if (m) return m[1] + "年" + parseInt(m[2], 10) + "月";
+        }
+        return null;
+    }"""
+    try:
+        return page.evaluate(page_js)
+    except Exception:
+        return None
 
 def locate_calendar_root(page, hint: str, facility: Dict[str, Any] = None):
     with time_section("locate_calendar_root"):
@@ -384,37 +524,69 @@ def locate_calendar_root(page, hint: str, facility: Dict[str, Any] = None):
             loc = page.locator(sel_cfg)
             if loc.count() > 0:
                 return loc.first
-        candidates = []
-        weekday_markers = ["日曜日","月曜日","火曜日","水曜日","木曜日","金曜日","土曜日","日","月","火","水","木","金","土"]
-        for sel in ("[role='grid']", "table", "section", "div.calendar", "div"):
-            loc = page.locator(sel)
-            cnt = loc.count()
-            for i in range(cnt):
-                el = loc.nth(i)
-                try:
-                    t = (el.inner_text() or "").strip()
-                except Exception:
-                    continue
-                score = 0
-                if hint and hint in t: score += 2
-                wk = sum(1 for w in weekday_markers if w in t)
-                if wk >= 4: score += 3
-                try:
-                    cells = el.locator(":scope tbody td, :scope [role='gridcell'], :scope .fc-daygrid-day, :scope .calendar-day")
-                    if cells.count() >= 28: score += 3
-                except Exception:
-                    pass
-                if score >= 5:
-                    candidates.append((score, el))
-        if not candidates:
-            raise RuntimeError("カレンダー枠の特定に失敗（候補が見つからないため監視を中止）。")
-        candidates.sort(key=lambda x: x[0], reverse=True)
-        return candidates[0][1]
+        # 候補の列挙とスコアリングをページ内 JS で一括実行する。
+        # 以前は "div" を含む全候補に inner_text() / count() を往復していて
+        # 候補数ぶんの IPC が発生していた。最良候補には data-cal-root を付けて
+        # Locator は 1 回だけ解決する
+        js = """(hint) => {
+            document.querySelectorAll('[data-cal-root]').forEach(el => el.removeAttribute('data-cal-root'));
+            const sels = ["[role='grid']", "table", "section", "div.calendar"];
+            const markers = ["日曜日","月曜日","火曜日","水曜日","木曜日","金曜日","土曜日","日","月","火","水","木","金","土"];
+            const seen = new Set();
+            let best = null, bestScore = -1;
+            for (const s of sels) {
+                for (const el of document.querySelectorAll(s)) {
+                    if (seen.has(el)) continue;
+                    seen.add(el);
+                    const t = (el.innerText || "").trim();
+                    let score = 0;
+                    if (hint && t.includes(hint)) score += 2;
+                    let wk = 0;
+                    for (const w of markers) if (t.includes(w)) wk++;
+                    if (wk >= 4) score += 3;
+                    const cells = el.querySelectorAll(":scope tbody td, :scope [role='gridcell'], :scope .fc-daygrid-day, :scope .calendar-day").length;
+                    if (cells >= 28) score += 3;
+                    // 曜日とセル数が両方そろえばカレンダー確定。残りの候補走査を打ち切る
+                    if (score >= 6) { el.setAttribute('data-cal-root', '1'); return true; }
+                    if (score >= 5 && score > bestScore) { best = el; bestScore = score; }
+                }
+            }
+            if (best) { best.setAttribute('data-cal-root', '1'); return true; }
+            return false;
+        }"""
+        found = False
+        try:
+            found = bool(page.evaluate(js, hint or ""))
+        except Exception as e:
+            print(f"[WARN] calendar-root scoring evaluate failed: {e}", flush=True)
+        if found:
+            loc = page.locator("[data-cal-root='1']")
+            if loc.count() > 0:
+                return loc.first
+        raise RuntimeError("カレンダー枠の特定に失敗（候補が見つからないため監視を中止）。")
+
+def _calendar_root_cached(page, hint: str, facility: Dict[str, Any] = None):
+    """locate_calendar_root の結果を施設 dict に載せて月遷移をまたいで再利用する。
+
+    サイトは月移動でテーブルの中身だけを差し替えるためコンテナ自体の
+    Locator は使い回せる。デタッチされていた場合のみ再スキャンする。
+    """
+    root = (facility or {}).get("_cal_root")
+    if root is not None:
+        try:
+            if not root.evaluate("el => !el.isConnected"):
+                return root
+        except Exception:
+            pass
+    root = locate_calendar_root(page, hint, facility)
+    if facility is not None:
+        facility["_cal_root"] = root
+    return root
 
 # ====== ★月移動（従来のコード＋ガード） ======
 def _compute_next_month_text(prev: str) -> str:
     try:
-        m = re.match(r"(\d{4})年(\d{1,2})月", prev or "")
+        m = YM_HEAD_RE.match(prev or "")
         if not m: return ""
         y, mo = int(m.group(1)), int(m.group(2))
         if mo == 12:
@@ -426,7 +598,7 @@ def _compute_next_month_text(prev: str) -> str:
         return ""
 
 def _next_yyyymm01(prev: str) -> Optional[str]:
-    m = re.match(r"(\d{4})年(\d{1,2})月", prev or "")
+    m = YM_HEAD_RE.match(prev or "")
     if not m: return None
     y, mo = int(m.group(1)), int(m.group(2))
     if mo == 12:
@@ -437,7 +609,7 @@ def _next_yyyymm01(prev: str) -> Optional[str]:
 
 def _ym(text: Optional[str]) -> Optional[Tuple[int,int]]:
     if not text: return None
-    m = re.match(r"(\d{4})年(\d{1,2})月", text)
+    m = YM_HEAD_RE.match(text)
     return (int(m.group(1)), int(m.group(2))) if m else None
 
 def _is_forward(prev: str, cur: str) -> bool:
@@ -446,13 +618,13 @@ def _is_forward(prev: str, cur: str) -> bool:
     (py, pm), (cy, cm) = p, c
     return (pm == 12 and cy == py + 1 and cm == 1) or (cy == py and cm == pm + 1)
 
-def click_next_month(page, label_primary="次の月", calendar_root=None, prev_month_text=None, wait_timeout_ms=20000, facility=None) -> bool:
+def click_next_month(page, label_primary="次の月", calendar_root=None, prev_month_text=None, wait_timeout_ms=20000, facility=None):
     def _safe_click(el, note=""):
         if TIMING_VERBOSE:
             with time_section(f"next-month click {note}"):
-                el.scroll_into_view_if_needed(); el.click(timeout=2000)
+                el.click(timeout=2000)
         else:
-            el.scroll_into_view_if_needed(); el.click(timeout=2000)
+            el.click(timeout=2000)
 
     with time_section("next-month: find & click"):
         # ★ ガード：必ず月表示でのみ実行
@@ -461,34 +633,54 @@ def click_next_month(page, label_primary="次の月", calendar_root=None, prev_m
             return False
 
         clicked = False
-        sel_cfg = (facility or {}).get("next_month_selector")
-        cands = [sel_cfg] if sel_cfg else []
-        cands += ["a:has-text('次の月')", "a:has-text('翌月')"]
-        for sel in cands:
-            if not sel: continue
-            try:
-                el = page.locator(sel).first
-                if el and el.count() > 0:
-                    _safe_click(el, sel); clicked = True; break
-            except Exception: pass
+        # 2 回目以降は初回の href 走査で覚えた moveCalender 呼び出しを直接実行し、
+        # ロケータ探索のカスケードを丸ごと飛ばす
+        tpl = (facility or {}).get("_move_js")
+        if tpl and prev_month_text:
+            target = _next_yyyymm01(prev_month_text)
+            if target:
+                try:
+                    with time_section("next-month via cached moveCalender"):
+                        page.evaluate(tpl.replace("{YMD}", target))
+                    clicked = True
+                except Exception as e:
+                    print(f"[WARN] cached moveCalender call failed: {e}", flush=True)
+        if not clicked:
+            sel_cfg = (facility or {}).get("next_month_selector")
+            cands = [sel_cfg] if sel_cfg else []
+            # ラベル候補はカンマ結合の 1 セレクタにまとめて探索を 1 回にする
+            cands.append("a:has-text('次の月'), a:has-text('翌月')")
+            for sel in cands:
+                if not sel: continue
+                try:
+                    el = page.locator(sel).first
+                    if el and el.count() > 0:
+                        _safe_click(el, sel); clicked = True; break
+                except Exception: pass
         if not clicked and prev_month_text:
             try:
                 target = _next_yyyymm01(prev_month_text)
                 els = page.locator("a[href*='moveCalender']").all()
                 chosen = None; chosen_date = None
                 cur01 = None
-                m = re.match(r"(\d{4})年(\d{1,2})月", prev_month_text)
+                m = YM_HEAD_RE.match(prev_month_text)
                 if m: cur01 = f"{int(m.group(1)):04d}{int(m.group(2)):02d}01"
+                chosen_href = None
                 for e in els:
                     href = e.get_attribute("href") or ""
-                    m2 = re.search(r"moveCalender\([^,]+,[^,]+,\s*(\d{8})\)", href)
+                    m2 = _MOVECAL_HREF_RE.search(href)
                     if not m2: continue
                     ymd = m2.group(1)
-                    if target and ymd == target: chosen, chosen_date = e, ymd; break
+                    if target and ymd == target: chosen, chosen_date, chosen_href = e, ymd, href; break
                     if cur01 and ymd > cur01 and (chosen_date is None or ymd < chosen_date):
-                        chosen, chosen_date = e, ymd
+                        chosen, chosen_date, chosen_href = e, ymd, href
                 if chosen:
                     _safe_click(chosen, f"href {chosen_date}"); clicked = True
+                    # 呼び出しテンプレートを施設 dict に保存（日付部分だけ差し替えて再利用）
+                    if facility is not None and chosen_href:
+                        mjs = _JS_HREF_RE.match(chosen_href)
+                        if mjs:
+                            facility["_move_js"] = _YYYYMMDD_RE.sub("{YMD}", mjs.group(1), count=1)
             except Exception:
                 pass
     if not clicked:
@@ -497,8 +689,11 @@ def click_next_month(page, label_primary="次の月", calendar_root=None, prev_m
         goal = _compute_next_month_text(prev_month_text or "")
         try:
             if goal:
+                # body 全文の innerText はポーリングごとにレイアウト計算＋全文走査になる。
+                # 月表示テーブル（無ければ body）に絞って 1 ポーリングを軽くする
                 page.wait_for_function(
-                    """(g)=>{ return document.body.innerText.includes(g); }""",
+                    """(g)=>{ const el = document.querySelector("table.m_akitablelist") || document.body;
+                              return (el.innerText || "").includes(g); }""",
                     arg=goal, timeout=wait_timeout_ms
                 )
         except Exception:
@@ -510,213 +705,220 @@ def click_next_month(page, label_primary="次の月", calendar_root=None, prev_m
         if prev_month_text and cur and not _is_forward(prev_month_text, cur):
             print(f"[WARN] next-month moved backward: {prev_month_text} -> {cur}", flush=True)
             return False
-    return True
+    # 確認時に取得済みの月テキストを返し、呼び出し側の再取得を不要にする
+    return cur or True
 
 # ====== 集計（従来の月表示解析） ======
+def _compiled_keyword_res(patterns: Dict[str, Any]) -> Dict[str, "re.Pattern"]:
+    """キーワード一覧をカテゴリごとの選択肢正規表現へ一度だけコンパイルする。
+
+    結果は patterns 辞書（config 由来）に "_re" として載せてプロセス内で再利用。
+    セルごとのキーワード×カテゴリの総当たり in 判定を 1 カテゴリ 1 search に置換。
+    """
+    res = patterns.get("_re")
+    if res is None:
+        res = {}
+        for cat in ("circle", "triangle", "cross"):
+            kws = patterns.get(cat) or []
+            if kws:
+                res[cat] = re.compile("|".join(re.escape(str(k).lower()) for k in kws))
+        patterns["_re"] = res
+    return res
+
+# 記号ゆれ（〇/◯→○、全角空白→半角）は translate 1 回で先に正規化する
+_NORMALIZE_TBL = str.maketrans({"〇": "○", "◯": "○", "　": " "})
+
+# 同じ文言のセル（"休館日"、週末の "×" など）が月内で繰り返されるため
+# 判定結果を文字列単位でメモ化する。patterns の id をキーに含めることで
+# config 再読込時は自然に無効化される
+_CLASSIFY_CACHE: Dict[Tuple[int, str], Optional[str]] = {}
+_CLASSIFY_CACHE_MAX = 4096
+
 def _st_from_text_and_src(raw: str, patterns: Dict[str, List[str]]) -> Optional[str]:
     if raw is None:
         return None
-    txt = raw.strip()
-    n = txt.replace("　", " ").lower()
-    for ch in ["○", "◯", "△", "×"]:
+    txt = raw.translate(_NORMALIZE_TBL).strip()
+    key = (id(patterns), txt)
+    if key in _CLASSIFY_CACHE:
+        return _CLASSIFY_CACHE[key]
+    st = None
+    for ch in ("○", "△", "×"):
         if ch in txt:
-            return {"◯": "○"}.get(ch, ch)
-    for kw in patterns["circle"]:
-        if kw.lower() in n: return "○"
-    for kw in patterns["triangle"]:
-        if kw.lower() in n: return "△"
-    for kw in patterns["cross"]:
-        if kw.lower() in n: return "×"
-    return None
+            st = ch
+            break
+    if st is None:
+        n = txt.lower()
+        res = _compiled_keyword_res(patterns)
+        if "circle" in res and res["circle"].search(n): st = "○"
+        elif "triangle" in res and res["triangle"].search(n): st = "△"
+        elif "cross" in res and res["cross"].search(n): st = "×"
+    if len(_CLASSIFY_CACHE) < _CLASSIFY_CACHE_MAX:
+        _CLASSIFY_CACHE[key] = st
+    return st
 
 def _status_from_class(cls: str, css_class_patterns: Dict[str, List[str]]) -> Optional[str]:
     if not cls: return None
     c = cls.lower()
-    for kw in css_class_patterns["circle"]:
-        if kw in c: return "○"
-    for kw in css_class_patterns["triangle"]:
-        if kw in c: return "△"
-    for kw in css_class_patterns["cross"]:
-        if kw in c: return "×"
+    res = _compiled_keyword_res(css_class_patterns)
+    if "circle" in res and res["circle"].search(c): return "○"
+    if "triangle" in res and res["triangle"].search(c): return "△"
+    if "cross" in res and res["cross"].search(c): return "×"
     return None
 
 def _extract_td_blocks(html: str) -> List[Dict[str, str]]:
     td_blocks: List[Dict[str, str]] = []
-    for m in re.finditer(r"\<td\b([^\>]*)\>(.*?)</td\>", html, flags=re.IGNORECASE | re.DOTALL):
+    for m in _TD_RE.finditer(html):
         attrs = m.group(1) or ""
         inner = m.group(2) or ""
-        cls = ""
-        title = ""
-        aria = ""
-        mcls = re.search(r'class\s*=\s*"([^"]*)"', attrs, flags=re.IGNORECASE)
-        if mcls: cls = mcls.group(1)
-        mtitle = re.search(r'title\s*=\s*"([^"]*)"', attrs, flags=re.IGNORECASE)
-        if mtitle: title = mtitle.group(1)
-        maria = re.search(r'aria-label\s*=\s*"([^"]*)"', attrs, flags=re.IGNORECASE)
-        if maria: aria = maria.group(1)
-        td_blocks.append({"attrs": attrs, "class": cls, "title": title, "aria": aria, "inner": inner})
+        # class/title/aria-label は 1 回の findall でまとめて拾う（3 search → 1）
+        found = {k.lower(): v for k, v in _TD_ATTRS_RE.findall(attrs)}
+        td_blocks.append({
+            "attrs": attrs,
+            "class": found.get("class", ""),
+            "title": found.get("title", ""),
+            "aria": found.get("aria-label", ""),
+            "inner": inner,
+        })
     return td_blocks
 
 def _inner_text_like(html_fragment: str) -> str:
-    s = re.sub(r"\<br\s*/?\>", " ", html_fragment, flags=re.IGNORECASE)
-    s = re.sub(r"\<[^>]+\>", " ", s)
-    s = re.sub(r"\s+", " ", s)
-    return s.strip()
+    # <br> 除去とタグ除去をひとつの選択肢パターンに束ね、走査を 3 回 → 2 回にする
+    return _WS_RE.sub(" ", _STRIP_RE.sub(" ", html_fragment)).strip()
 
 def _find_day_in_text(text: str) -> Optional[str]:
-    m = re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", text)
+    # "日" を含まないセル（ヘッダ・空セル）は正規表現を起動せずに弾く
+    if not text or "日" not in text:
+        return None
+    m = DAY_ANY_RE.search(text)
     return m.group(0) if m else None
 
-def summarize_vacancies(page, calendar_root, config):
-    with time_section("summarize_vacancies(html-parse)"):
-        patterns = config["status_patterns"]
-        css_class_patterns = config["css_class_patterns"]
-        summary = {"○": 0, "△": 0, "×": 0, "未判定": 0}
-        details: List[Dict[str, str]] = []
-        html = ""
+def _td_cells_from_html(html: str) -> List[Dict[str, Any]]:
+    """<td> 単位の {text, class, title, aria, imgs} を返す。
+
+    selectolax（lexbor）があれば C 実装のパーサでタグ走査し、
+    無ければ従来の正規表現抽出に落とす。
+    """
+    cells: List[Dict[str, Any]] = []
+    if LexborHTMLParser is not None:
         try:
-            html = calendar_root.evaluate("el => el.outerHTML")
-        except Exception:
-            return _summarize_vacancies_fallback(page, calendar_root, config)
-        td_blocks = _extract_td_blocks(html)
-        for td in td_blocks:
-            inner = td["inner"]
-            text_like = _inner_text_like(inner)
-            day = _find_day_in_text(text_like)
-            if not day:
-                attr_text = " ".join([td.get("title", ""), td.get("aria", "")])
-                day = _find_day_in_text(attr_text)
-            if not day:
-                for mm in re.finditer(r"\<img\b([^\>]*)\>", inner, flags=re.IGNORECASE):
-                    img_attrs = mm.group(1) or ""
-                    alt = ""
-                    ititle = ""
-                    malt = re.search(r'alt\s*=\s*"([^"]*)"', img_attrs, flags=re.IGNORECASE)
-                    if malt: alt = malt.group(1) or ""
-                    mti = re.search(r'title\s*=\s*"([^"]*)"', img_attrs, flags=re.IGNORECASE)
-                    if mti: ititle = mti.group(1) or ""
-                    dd = _find_day_in_text(f"{alt} {ititle}")
-                    if dd:
-                        day = dd
-                        break
-            if not day:
-                continue
-            st = _st_from_text_and_src(text_like, patterns)
-            if not st:
-                for mm in re.finditer(r"\<img\b([^\>]*)\>", inner, flags=re.IGNORECASE):
-                    img_attrs = mm.group(1) or ""
-                    alt = ""
-                    ititle = ""
-                    src = ""
-                    malt = re.search(r'alt\s*=\s*"([^"]*)"', img_attrs, flags=re.IGNORECASE)
-                    if malt: alt = malt.group(1) or ""
-                    mti = re.search(r'title\s*=\s*"([^"]*)"', img_attrs, flags=re.IGNORECASE)
-                    if mti: ititle = mti.group(1) or ""
-                    msrc = re.search(r'src\s*=\s*"([^"]*)"', img_attrs, flags=re.IGNORECASE)
-                    if msrc: src = msrc.group(1) or ""
-                    st = _st_from_text_and_src(f"{alt} {ititle} {src}", patterns)
-                    if st:
-                        break
-            if not st:
-                st = _status_from_class(td.get("class", ""), css_class_patterns)
-            if not st:
-                st = "未判定"
-            summary[st] = summary.get(st, 0) + 1
-            details.append({"day": day, "status": st, "text": text_like})
-        return summary, details
+            tree = LexborHTMLParser(html)
+            for td in tree.css("td"):
+                # 入れ子テーブルの外側 td は配下の全セル文言を抱え込んで
+                # 日付セルに誤判定されるため、葉の td だけを対象にする
+                # （正規表現フォールバックの <td>〜</td> 非貪欲マッチと同じ粒度）。
+                # lexbor の css() は自分自身も返すため「2 件以上 = 入れ子あり」で判定
+                if len(td.css("td")) > 1:
+                    continue
+                attrs = td.attributes or {}
+                cells.append({
+                    "text": td.text(deep=True, separator=" ", strip=True),
+                    "class": attrs.get("class") or "",
+                    "title": attrs.get("title") or "",
+                    "aria": attrs.get("aria-label") or "",
+                    "imgs": [{
+                        "alt": (im.attributes or {}).get("alt") or "",
+                        "title": (im.attributes or {}).get("title") or "",
+                        "src": (im.attributes or {}).get("src") or "",
+                    } for im in td.css("img")],
+                })
+            return cells
+        except Exception as e:
+            print(f"[WARN] selectolax parse failed: {e}", flush=True)
+            cells = []
+    for td in _extract_td_blocks(html):
+        inner = td["inner"]
+        imgs = []
+        for mm in _IMG_RE.finditer(inner):
+            ia = {k.lower(): v for k, v in _IMG_ATTRS_RE.findall(mm.group(1) or "")}
+            imgs.append({"alt": ia.get("alt", ""), "title": ia.get("title", ""), "src": ia.get("src", "")})
+        cells.append({
+            "text": _inner_text_like(inner),
+            "class": td.get("class", ""),
+            "title": td.get("title", ""),
+            "aria": td.get("aria", ""),
+            "imgs": imgs,
+        })
+    return cells
+
+def _fetch_calendar_html(cal_root) -> str:
+    # スクロールと outerHTML 取得を 1 回の evaluate に融合（往復 2→1）。
+    # 集計と保存で同じ文字列を使い回すため、取得はこの 1 箇所に集約する
+    return cal_root.evaluate("el => { el.scrollIntoView({block: 'center'}); return el.outerHTML; }")
+
+def _summarize_cells(cells: List[Dict[str, Any]], config) -> Tuple[Dict[str, int], List[Dict[str, str]]]:
+    patterns = config["status_patterns"]
+    css_class_patterns = config["css_class_patterns"]
+    summary = {"○": 0, "△": 0, "×": 0, "未判定": 0}
+    details: List[Dict[str, str]] = []
+    for cell in cells:
+        text_like = cell["text"]
+        day = _find_day_in_text(text_like)
+        if not day:
+            day = _find_day_in_text(f"{cell['title']} {cell['aria']}")
+        if not day:
+            for im in cell["imgs"]:
+                dd = _find_day_in_text(f"{im['alt']} {im['title']}")
+                if dd:
+                    day = dd
+                    break
+        if not day:
+            continue
+        st = _st_from_text_and_src(text_like, patterns)
+        if not st:
+            for im in cell["imgs"]:
+                st = _st_from_text_and_src(f"{im['alt']} {im['title']} {im['src']}", patterns)
+                if st:
+                    break
+        if not st:
+            st = _status_from_class(cell["class"], css_class_patterns)
+        if not st:
+            st = "未判定"
+        summary[st] = summary.get(st, 0) + 1
+        details.append({"day": day, "status": st, "text": text_like})
+    return summary, details
+
+def summarize_vacancies(page, calendar_root, config, html: Optional[str] = None):
+    with time_section("summarize_vacancies(html-parse)"):
+        if html is None:
+            try:
+                html = _fetch_calendar_html(calendar_root)
+            except Exception:
+                return _summarize_vacancies_fallback(page, calendar_root, config)
+        return _summarize_cells(_td_cells_from_html(html), config)
 
 def _summarize_vacancies_fallback(page, calendar_root, config):
     with time_section("summarize_vacancies(fallback)"):
-        import re as _re
-        patterns = config["status_patterns"]
-        summary = {"○": 0, "△": 0, "×": 0, "未判定": 0}
-        details: List[Dict[str, str]] = []
-        def _st(raw: str) -> Optional[str]:
-            return _st_from_text_and_src(raw, patterns)
-        cands = calendar_root.locator(":scope tbody td, :scope [role='gridcell']")
-        for i in range(cands.count()):
-            el = cands.nth(i)
-            try:
-                txt = (el.inner_text() or "").strip()
-            except Exception:
-                continue
-            head = txt[:40]
-            m = _re.search(r"^([1-9]\d?|1\d|2\d|3[01])\s*日", head, flags=_re.MULTILINE)
-            if not m:
-                try:
-                    aria = el.get_attribute("aria-label") or ""
-                    title = el.get_attribute("title") or ""
-                    m = _re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", aria + " " + title)
-                except Exception:
-                    pass
-            if not m:
-                try:
-                    imgs = el.locator("img"); jcnt = imgs.count()
-                    for j in range(jcnt):
-                        alt = imgs.nth(j).get_attribute("alt") or ""
-                        tit = imgs.nth(j).get_attribute("title") or ""
-                        mm = _re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", alt + " " + tit)
-                        if mm:
-                            m = mm
-                            break
-                except Exception:
-                    pass
-            if not m:
-                continue
-            day = f"{m.group(1)}日"
-            st = _st(txt)
-            if not st:
-                try:
-                    imgs = el.locator("img"); jcnt = imgs.count()
-                    for j in range(jcnt):
-                        alt = imgs.nth(j).get_attribute("alt") or ""
-                        tit = imgs.nth(j).get_attribute("title") or ""
-                        src = imgs.nth(j).get_attribute("src") or ""
-                        st = _st(alt + " " + tit) or _st(src)
-                        if st:
-                            break
-                except Exception:
-                    pass
-            if not st:
-                try:
-                    aria = el.get_attribute("aria-label") or ""
-                    tit = el.get_attribute("title") or ""
-                    cls = (el.get_attribute("class") or "").lower()
-                    st = _st(aria + " " + tit)
-                    if not st:
-                        for kw in config["css_class_patterns"]["circle"]:
-                            if kw in cls:
-                                st = "○"; break
-                    if not st:
-                        for kw in config["css_class_patterns"]["triangle"]:
-                            if kw in cls:
-                                st = "△"; break
-                    if not st:
-                        for kw in config["css_class_patterns"]["cross"]:
-                            if kw in cls:
-                                st = "×"; break
-                except Exception:
-                    pass
-            if not st:
-                st = "未判定"
-            summary[st] = summary.get(st, 0) + 1
-            details.append({"day": day, "status": st, "text": txt})
-        return summary, details
+        # ルートハンドルが失効している場合はページ全体の HTML を 1 回で取り直し、
+        # 通常経路と同じパーサに通す。カレンダー外の td は "日" を含まないため
+        # 集計から自然に外れる
+        try:
+            html = page.content()
+        except Exception as e:
+            print(f"[WARN] fallback page.content failed: {e}", flush=True)
+            return {"○": 0, "△": 0, "×": 0, "未判定": 0}, []
+        return _summarize_cells(_td_cells_from_html(html), config)
 
 # ====== 保存・ローテーション ======
 from datetime import datetime as _dt
+# (施設, 月) ごとのサニタイズ＋mkdir は初回だけ行う
+_MONTH_DIR_CACHE: Dict[Tuple[str, str], Path] = {}
+
 def facility_month_dir(short: str, month_text: str) -> Path:
-    safe_fac = re.sub(r"[\\/:*?\"<>\n]+","_", short)
-    safe_month = re.sub(r"[\\/:*?\"<>\n]+","_", month_text or "unknown_month")
-    d = OUTPUT_ROOT / safe_fac / safe_month
-    with time_section(f"mkdir outdir: {d}"): safe_mkdir(d)
+    key = (short, month_text or "unknown_month")
+    d = _MONTH_DIR_CACHE.get(key)
+    if d is None:
+        safe_fac = _SAFE_NAME_RE.sub("_", short)
+        safe_month = _SAFE_NAME_RE.sub("_", month_text or "unknown_month")
+        d = OUTPUT_ROOT / safe_fac / safe_month
+        with time_section(f"mkdir outdir: {d}"): safe_mkdir(d)
+        _MONTH_DIR_CACHE[key] = d
     return d
 
 def load_last_payload(outdir: Path) -> Optional[Dict[str, Any]]:
     p = outdir / "status_counts.json"
     if not p.exists(): return None
     try:
-        return json.loads(p.read_text("utf-8"))
+        return _json_loads_bytes(p.read_bytes())
     except Exception:
         return None
 
@@ -731,25 +933,51 @@ def summaries_changed(prev, cur) -> bool:
         if (prev or {}).get(k,0) != (cur or {}) .get(k,0): return True
     return False
 
-def save_calendar_assets(cal_root, outdir: Path, save_ts: bool):
+def save_calendar_assets(cal_root, outdir: Path, save_ts: bool, html: Optional[str] = None):
+    # JPEG はエンコードが PNG より大幅に軽く、監視用途には q80 で十分
+    img_ext = ".jpg" if SNAPSHOT_JPEG else ".png"
+    shot_kwargs = {"type": "jpeg", "quality": 80} if SNAPSHOT_JPEG else {}
     latest_html = outdir / "calendar.html"
-    latest_png = outdir / "calendar.png"
-    ts = _dt.now().strftime("%Y%m%d_%H%M%S")
+    latest_png = outdir / f"calendar{img_ext}"
+    hash_path = outdir / "calendar.sha256"
+    n = _dt.now()
+    ts = f"{n.year:04d}{n.month:02d}{n.day:02d}_{n.hour:02d}{n.minute:02d}{n.second:02d}"
     html_ts = outdir / f"calendar_{ts}.html"
-    png_ts = outdir / f"calendar_{ts}.png"
-    safe_write_text(latest_html, cal_root.evaluate("el => el.outerHTML"))
-    safe_element_screenshot(cal_root, latest_png)
+    png_ts = outdir / f"calendar_{ts}{img_ext}"
+    # 集計側で取得済みの HTML があればそれを使い、取得は月あたり 1 回にする
+    if html is None:
+        html = _fetch_calendar_html(cal_root)
+    # 変化判定はハッシュ比較（前回HTML全文の読み戻し・比較を避ける）
+    h = hashlib.sha256(html.encode("utf-8")).hexdigest()
+    prev_h = None
+    try:
+        if hash_path.exists():
+            prev_h = hash_path.read_text("utf-8").strip()
+    except Exception:
+        prev_h = None
+    changed = (prev_h != h) or not latest_html.exists()
+    # HTML の書き込みはスクリーンショットのラスタライズと並行して行う
+    futures = []
+    if changed:
+        futures.append(_IO_POOL.submit(safe_write_text, latest_html, html))
+        futures.append(_IO_POOL.submit(safe_write_text, hash_path, h))
+    # スクリーンショットは CDP 往復＋レンダリングが重いので変化時のみ撮る
+    # （ALWAYS_SNAPSHOT=1 でデバッグ用に毎回撮影へ戻せる）
+    if ALWAYS_SNAPSHOT or changed or not latest_png.exists():
+        cal_root.screenshot(path=str(latest_png), **shot_kwargs)
     ts_html = ts_png = None
     if save_ts:
-        safe_write_text(html_ts, cal_root.evaluate("el => el.outerHTML"))
-        safe_element_screenshot(cal_root, png_ts)
+        futures.append(_IO_POOL.submit(safe_write_text, html_ts, html))
+        cal_root.screenshot(path=str(png_ts), **shot_kwargs)
         ts_html, ts_png = html_ts, png_ts
+    for f in futures:
+        f.result()
     return latest_html, latest_png, ts_html, ts_png
 
 def rotate_snapshot_files(outdir: Path, max_png: int = 50, max_html: int = 50) -> None:
     try:
         png_ts = sorted(
-            [p for p in outdir.glob("calendar_*.png") if p.is_file()],
+            [p for pat in ("calendar_*.png", "calendar_*.jpg") for p in outdir.glob(pat) if p.is_file()],
             key=lambda p: p.stat().st_mtime
         )
         if len(png_ts) > max_png:
@@ -776,12 +1004,12 @@ IMPROVE_TRANSITIONS = {
     ("未判定", "○"),
 }
 def _parse_month_text(month_text: str) -> Optional[Tuple[int, int]]:
-    m = re.match(r"(\d{4})年(\d{1,2})月", month_text or "")
+    m = YM_HEAD_RE.match(month_text or "")
     if not m: return None
     return int(m.group(1)), int(m.group(2))
 
 def _day_str_to_int(day_str: str) -> Optional[int]:
-    m = re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", day_str or "")
+    m = DAY_ANY_RE.search(day_str or "")
     return int(m.group(1)) if m else None
 
 def _weekday_jp(dt: datetime.date) -> str:
@@ -794,206 +1022,8 @@ def _is_japanese_holiday(dt: datetime.date) -> bool:
     try: return jpholiday.is_holiday(dt)
     except Exception: return False
 
-DISCORD_CONTENT_LIMIT = 2000
-DISCORD_EMBED_DESC_LIMIT = 4096
-def _split_content(s: str, limit: int = DISCORD_CONTENT_LIMIT) -> List[str]:
-    out: List[str] = []
-    cur = (s or "").strip()
-    while len(cur) > limit:
-        cut = cur.rfind("\n", 0, limit)
-        if cut < 0: cut = cur.rfind(" ", 0, limit)
-        if cut < 0: cut = limit
-        out.append(cur[:cut].rstrip())
-        cur = cur[cut:].lstrip()
-    if cur:
-        out.append(cur)
-    return out
-
-def _truncate_embed_description(desc: str) -> str:
-    if desc is None: return ""
-    if len(desc) <= DISCORD_EMBED_DESC_LIMIT: return desc
-    return desc[:DISCORD_EMBED_DESC_LIMIT - 3] + "..."
-
-def _build_mention_and_allowed() -> Tuple[str, Dict[str, Any]]:
-    mention = ""
-    allowed: Dict[str, Any] = {}
-    uid = os.getenv("DISCORD_MENTION_USER_ID", "").strip()
-    use_everyone = os.getenv("DISCORD_USE_EVERYONE", "0").strip() == "1"
-    use_here = os.getenv("DISCORD_USE_HERE", "0").strip() == "1"
-    if uid:
-        mention = f"<@{uid}>"
-        allowed = {"allowed_mentions": {"parse": [], "users": [uid]}}
-    elif use_everyone:
-        mention = "@everyone"
-        allowed = {"allowed_mentions": {"parse": ["everyone"]}}
-    elif use_here:
-        mention = "@here"
-        allowed = {"allowed_mentions": {"parse": []}}
-    else:
-        allowed = {"allowed_mentions": {"parse": []}}
-    return mention, allowed
-
-class DiscordWebhookClient:
-    def __init__(self, webhook_url: str, thread_id: Optional[str] = None, wait: bool = True,
-                 user_agent: Optional[str] = None, timeout_sec: int = 10):
-        if not webhook_url:
-            raise ValueError("webhook_url is required")
-        self.webhook_url = webhook_url
-        self.thread_id = thread_id
-        self.wait = wait
-        self.timeout_sec = timeout_sec
-        self.user_agent = user_agent or "facility-monitor/1.0 (+python-urllib)"
-
-    @staticmethod
-    def from_env() -> "DiscordWebhookClient":
-        url = os.getenv("DISCORD_WEBHOOK_URL", "").strip()
-        th = os.getenv("DISCORD_THREAD_ID", "").strip() or None
-        wt = os.getenv("DISCORD_WAIT", "1").strip() == "1"
-        ua = os.getenv("DISCORD_USER_AGENT", "").strip() or None
-        return DiscordWebhookClient(webhook_url=url, thread_id=th, wait=wt, user_agent=ua)
-
-    def _post(self, payload: Dict[str, Any]) -> Tuple[int, str, Dict[str, Any]]:
-        import urllib.request, urllib.error, ssl
-        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-        url = self.webhook_url
-        params = []
-        if self.wait: params.append("wait=true")
-        if self.thread_id: params.append(f"thread_id={self.thread_id}")
-        if params: url = f"{url}?{'&'.join(params)}"
-        req = urllib.request.Request(url=url, data=data,
-                                     headers={"Content-Type": "application/json", "User-Agent": self.user_agent})
-        ctx = ssl.create_default_context()
-        tries = 0
-        max_tries = 3
-        while True:
-            tries += 1
-            try:
-                with urllib.request.urlopen(req, context=ctx, timeout=self.timeout_sec) as resp:
-                    body = resp.read().decode("utf-8", errors="ignore")
-                    status = getattr(resp, "status", 200)
-                    headers = dict(resp.headers) if resp.headers else {}
-                    return status, body, headers
-            except urllib.error.HTTPError as e:
-                status = e.code
-                try:
-                    body = e.read().decode("utf-8", errors="ignore")
-                except Exception:
-                    body = ""
-                headers = dict(e.headers) if e.headers else {}
-                if status == 429 and tries < max_tries:
-                    retry_after = float(headers.get("Retry-After", "1.0"))
-                    print(f"[WARN] Discord 429: retry_after={retry_after}s; body={body}", flush=True)
-                    time.sleep(max(0.5, retry_after))
-                    continue
-                return status, body, headers
-            except Exception as e:
-                return -1, f"Exception: {e}", {}
-
-    def send_embed(self, title: str, description: str, color: int = 0x00B894, footer_text: str = "Facility monitor") -> bool:
-        mention, allowed = _build_mention_and_allowed()
-        one_line = (description or "").splitlines()[0] if description else ""
-        content = f"{mention} **{title}** — {one_line}".strip() if (mention or one_line or title) else ""
-        embed = {
-            "title": title,
-            "description": _truncate_embed_description(description or ""),
-            "color": color,
-            "timestamp": jst_now().isoformat(),
-            "footer": {"text": footer_text},
-        }
-        payload = {"content": content, "embeds": [embed], **allowed}
-        print("[DEBUG] payload preview:", json.dumps(payload, ensure_ascii=False), flush=True)
-        status, body, headers = self._post(payload)
-        if status in (200, 204):
-            print(f"[INFO] Discord notified (embed): title='{title}' len={len(description or '')} body={body}", flush=True)
-            return True
-        print(f"[WARN] Embed failed: HTTP {status}; body={body}. Falling back to plain text.", flush=True)
-        text = f"**{title}**\n{description or ''}"
-        return self.send_text(text)
-            
-    def send_text(self, content: str) -> bool:
-
-        # メンション付与は呼び出し側に一元化するため、ここでは付けない
-        # allowed_mentions は従来通り適用する
-        _, allowed = _build_mention_and_allowed()
-
-        pages = _split_content(content or "", limit=DISCORD_CONTENT_LIMIT)
-        ok_all = True
-
-        for i, page in enumerate(pages, 1):
-            payload = {"content": page, **allowed}
-            print("[DEBUG] payload preview:", json.dumps(payload, ensure_ascii=False), flush=True)
-            status, body, headers = self._post(payload)
-            if status in (200, 204):
-                print(f"[INFO] Discord notified (text p{i}/{len(pages)}): {len(page)} chars body={body}", flush=True)
-            else:
-                ok_all = False
-                print(f"[ERROR] Discord text failed (p{i}/{len(pages)}): HTTP {status} body={body}", flush=True)
-
-        return ok_all
-
-
-   
-# 施設ごとの色（通知 embed 用）
-_FACILITY_ALIAS_COLOR_HEX = {
-    "南浦和": "0x3498DB",  # Blue
-    "岩槻": "0x2ECC71",    # Green
-    "鈴谷": "0xF1C40F",    # Yellow
-    "岸町": "0xE74C3C",    # Red
-    "駒場": "0x8E44AD",    # Purple-ish
-}
-_DEFAULT_COLOR_HEX = "0x00B894"
-def _hex_to_int(hex_str: str) -> int:
-    try:
-        return int(hex_str, 16)
-    except Exception:
-        return int(_DEFAULT_COLOR_HEX, 16)
-
-
-def send_aggregate_lines(webhook_url: Optional[str], facility_alias: str, month_text: str, lines: List[str]) -> None:
-    if not webhook_url or not lines:
-        return
-
-    # 既存の設定（テキスト強制・行数制限）
-    force_text = (os.getenv("DISCORD_FORCE_TEXT", "0").strip() == "1")
-    max_lines_env = os.getenv("DISCORD_MAX_LINES", "").strip()
-    max_lines = None
-    try:
-        if max_lines_env:
-            max_lines = max(1, int(max_lines_env))
-    except Exception:
-        max_lines = None
-    if max_lines is not None and len(lines) > max_lines:
-        lines = lines[:max_lines] + [f"... ほか {len(lines) - max_lines} 件"]
-
-    # 件名・本文の組み立て（従来どおり）
-    title = f"{facility_alias}"
-    description = "\n".join(lines)
-
-    # ★ メンション＆allowed_mentions を復活
-    mention, allowed = _build_mention_and_allowed()
-    # 例：メンションユーザーIDを設定済なら "<@123456789012345678>" が入る
-    #     @everyone/@here は allowed_mentions の parse に応じて許可
-
-    # 色（embed用）
-    color_hex = _FACILITY_ALIAS_COLOR_HEX.get(facility_alias, _DEFAULT_COLOR_HEX)
-    color_int = _hex_to_int(color_hex)
-
-    # Webhookクライアント
-    client = DiscordWebhookClient.from_env()
-    client.webhook_url = webhook_url
-
-    # 強制テキスト送信（embedを使わない運用時）
-    if force_text:
-        content = f"{mention} **{title}**\n{description}".strip()  # ★ 冒頭にメンションを付与
-        payload = {"content": content, **allowed}
-        # 直接送る（client.send_text に渡す／または簡易POSTでもOKだが既存に合わせる）
-        client.send_text(content)  # allowed は client 内部で扱うため、必要なら send_text 実装をallowed対応へ拡張
-        return
-
-    # embed送信（こちらは client.send_embed が mention＋allowed を扱える設計）
-    # client.send_embed() は content に mention を付け、allowed_mentions を使用します
-    client.send_embed(title=title, description=description, color=color_int, footer_text="Facility monitor")
-
+# Discord 通知は discord_notify.py に一本化（重複実装を撤去）
+from discord_notify import DiscordWebhookClient, send_aggregate_lines
 
 # ====== ★戻る／施設選択／部屋選択 ======
 def back_to_facility_list(page) -> bool:
@@ -1005,7 +1035,6 @@ def back_to_facility_list(page) -> bool:
                 print("[WARN] back_to_facility_list: back button NOT FOUND.", flush=True)
                 ...
                 return False
-            el.scroll_into_view_if_needed()
             el.click(timeout=3000)
         except Exception as e:
             print(f"[WARN] back_to_facility_list: click failed: {e}", flush=True)
@@ -1024,7 +1053,6 @@ def back_to_facility_list(page) -> bool:
         try:
             el2 = page.locator(back_sel_build).first
             if el2 and el2.count() > 0:
-                el2.scroll_into_view_if_needed()
                 el2.click(timeout=3000)
                 page.wait_for_selector("table.tcontent a[href*='gRsvWTransInstSrchInstAction']", timeout=2000)
                 print("[INFO] back_to_facility_list: now at BUILD list (館選択)", flush=True)
@@ -1048,7 +1076,6 @@ def select_facility_by_code(page, code: str, cfg: Dict[str, Any]) -> bool:
         try:
             el = page.locator(sel).first
             if el and el.count() > 0:
-                el.scroll_into_view_if_needed()
                 el.click(timeout=5000)
                 return True
         except Exception as e:
@@ -1086,7 +1113,6 @@ def apply_post_facility_steps(page, facility: Dict[str, Any]) -> None:
                 for sel in (spec.get(label) or []):
                     el = page.locator(sel).first
                     if el and el.count() > 0:
-                        el.scroll_into_view_if_needed()
                         el.click(timeout=3000)
                         clicked = True
                         break
@@ -1110,8 +1136,7 @@ def _normalize_time_label(s: str) -> str:
     """ 全角→半角、空白除去など軽い正規化 """
     if s is None:
         return ""
-    z2h = str.maketrans("０１２３４５６７８９　", "0123456789 ")
-    return (s.strip().translate(z2h)).replace("~", "～")
+    return (s.strip().translate(_Z2H_TBL)).replace("~", "～")
 
 def map_time_label(facility_alias: str, raw_label: str) -> str:
     """ 施設別の時間帯ラベルを時刻レンジへ変換 """
@@ -1126,75 +1151,83 @@ def map_time_label(facility_alias: str, raw_label: str) -> str:
 
 def _detect_status_in_cell(cell, config) -> Optional[str]:
     """ 時間帯セルのステータス（空き or 予約あり 等）を判定 """
+    # img の alt/src とセル本文を 1 回の evaluate でまとめて取得（往復 4→1）
     try:
-        img = cell.locator("img").first
-        if img and img.count() > 0:
-            alt = img.get_attribute("alt") or ""
-            src = img.get_attribute("src") or ""
-            alt_n = alt.strip()
-            if alt_n:
-                if "空き" in alt_n:
-                    return "空き"
-                if "予約あり" in alt_n:
-                    return "予約あり"
-            fname = os.path.basename(src).lower()
-            if "empty" in fname or "lw_0.gif" in fname:
+        info = cell.evaluate("""el => {
+            const img = el.querySelector("img");
+            return {
+                hasImg: !!img,
+                alt: img ? (img.getAttribute("alt") || "") : "",
+                src: img ? (img.getAttribute("src") || "") : "",
+                text: el.innerText || ""
+            };
+        }""") or {}
+    except Exception:
+        return None
+    if info.get("hasImg"):
+        alt_n = (info.get("alt") or "").strip()
+        if alt_n:
+            if "空き" in alt_n:
                 return "空き"
-            if "finish" in fname or "lw_100.gif" in fname:
+            if "予約あり" in alt_n:
                 return "予約あり"
-            return "その他"
-    except Exception:
-        pass
-    try:
-        t = (cell.inner_text() or "").strip()
-        if "空き" in t:
+        fname = os.path.basename(info.get("src") or "").lower()
+        if "empty" in fname or "lw_0.gif" in fname:
             return "空き"
-        if "予約あり" in t:
+        if "finish" in fname or "lw_100.gif" in fname:
             return "予約あり"
-    except Exception:
-        pass
+        return "その他"
+    t = (info.get("text") or "").strip()
+    if "空き" in t:
+        return "空き"
+    if "予約あり" in t:
+        return "予約あり"
     return None
 
+_DAY_CELL_SELECTOR = ":scope tbody td, :scope [role='gridcell'], :scope .fc-daygrid-day"
+
 def _find_day_cell_in_month(page, calendar_root, day_int: int):
     """ 月表示カレンダー内から '15日' のような当該日のセル（a/selectDay を優先）を特定 """
     day_text = f"{day_int}日"
-    candidates = calendar_root.locator(":scope tbody td, :scope [role='gridcell'], :scope .fc-daygrid-day")
-    cnt = candidates.count()
-    for i in range(cnt):
-        el = candidates.nth(i)
-        try:
-            txt = (el.inner_text() or "")
-            if day_text in txt:
-                a = el.locator("a[href*='selectDay']").first
-                return a if a and a.count() > 0 else el
-        except Exception:
-            pass
-        try:
-            aria = el.get_attribute("aria-label") or ""
-            title = el.get_attribute("title") or ""
-            if day_text in (aria + " " + title):
-                a = el.locator("a[href*='selectDay']").first
-                return a if a and a.count() > 0 else el
-        except Exception:
-            pass
-        try:
-            imgs = el.locator("img")
-            jcnt = imgs.count()
-            for j in range(jcnt):
-                alt = imgs.nth(j).get_attribute("alt") or ""
-                tit = imgs.nth(j).get_attribute("title") or ""
-                if day_text in (alt + " " + tit):
-                    a = el.locator("a[href*='selectDay']").first
-                    return a if a and a.count() > 0 else el
-        except Exception:
-            pass
-    return None
-
+    # セルごとの inner_text/get_attribute/img 走査はセル数×数往復になるため、
+    # 一致セルの添字だけをページ内で探して Locator は 1 回で解決する
+    js = """(root, args) => {
+        const [sel, dayText] = args;
+        const cells = root.querySelectorAll(sel);
+        for (let i = 0; i < cells.length; i++) {
+            const el = cells[i];
+            let hit = (el.innerText || "").includes(dayText);
+            if (!hit) {
+                const attrs = (el.getAttribute("aria-label") || "") + " " + (el.getAttribute("title") || "");
+                hit = attrs.includes(dayText);
+            }
+            if (!hit) {
+                for (const im of el.querySelectorAll("img")) {
+                    const t = (im.getAttribute("alt") || "") + " " + (im.getAttribute("title") || "");
+                    if (t.includes(dayText)) { hit = true; break; }
+                }
+            }
+            if (hit) return {index: i, anchor: !!el.querySelector("a[href*='selectDay']")};
+        }
+        return null;
+    }"""
+    try:
+        found = calendar_root.evaluate(js, [_DAY_CELL_SELECTOR, day_text])
+    except Exception:
+        found = None
+    if not found:
+        return None
+    el = calendar_root.locator(_DAY_CELL_SELECTOR).nth(int(found["index"]))
+    if found.get("anchor"):
+        a = el.locator("a[href*='selectDay']").first
+        if a and a.count() > 0:
+            return a
+    return el
 
 def _header_patterns(month_text: Optional[str], day_int: int) -> List[re.Pattern]:
     """ヘッダ表記の揺れを吸収する正規表現の一覧"""
     pats: List[str] = []
-    m = re.search(r"(\d{4})年(\d{1,2})月", month_text or "")
+    m = YM_HEAD_RE.search(month_text or "")
     y, mo = (None, None)
     if m:
         y, mo = int(m.group(1)), int(m.group(2))
@@ -1284,7 +1317,6 @@ def _click_back_to_month(page) -> bool:
         try:
             el = page.locator(sel).first
             if el and el.count() > 0:
-                el.scroll_into_view_if_needed()
                 el.click(timeout=3000)
                 print("[BACK] timesheet -> month-view: clicked", flush=True)
                 clicked = True
@@ -1315,7 +1347,6 @@ def goto_day_and_collect_time_ranges(page, calendar_root, day_int: int, facility
         return []
     try:
         print(f"[CLICK] day={day_int}: target found", flush=True)
-        el.scroll_into_view_if_needed()
         el.click(timeout=3000)
         print(f"[CLICK] day={day_int}: SUCCESS", flush=True)
         grace_pause(page, "goto day detail")
@@ -1402,7 +1433,7 @@ def goto_day_and_collect_time_ranges(page, calendar_root, day_int: int, facility
     return uniq
 
 def _sortkey_time_range(s: str) -> Tuple[int, int]:
-    m = re.match(r"(\d{1,2})\D+(\d{1,2})", s or "")
+    m = _TIME_RANGE_RE.match(s or "")
     if not m:
         return (999, 999)
     return (int(m.group(1)), int(m.group(2)))
@@ -1411,11 +1442,11 @@ def compute_improved_days(prev_details: List[Dict[str, str]], cur_details: List[
     prev_map = {}
     cur_map = {}
     for d in (prev_details or []):
-        m = re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", d.get("day",""))
+        m = DAY_ANY_RE.search(d.get("day",""))
         if m:
             prev_map[int(m.group(1))] = d.get("status","未判定")
     for d in (cur_details or []):
-        m = re.search(r"([1-9]\d?|1\d|2\d|3[01])\s*日", d.get("day",""))
+        m = DAY_ANY_RE.search(d.get("day",""))
         if m:
             cur_map[int(m.group(1))] = d.get("status","未判定")
     improved = []
@@ -1448,6 +1479,155 @@ def build_time_increase_lines(page, calendar_root, facility_alias: str, month_te
     return lines
 
 # ====== メイン（施設単位の保存・通知・月遷移） ======
+def _process_one_facility(page, facility: Dict[str, Any], config: Dict[str, Any],
+                          idx: int, total: int,
+                          max_png_default: int, max_html_default: int,
+                          allow_back: bool = True) -> None:
+    """1施設分の巡回（保存・通知・月遷移）。allow_back=False で常にフル遷移。"""
+    alias = FACILITY_TITLE_ALIAS.get(facility.get('name',''), facility.get('name','')) or facility.get('name','')
+    print(f"[INFO] === Facility stage begin: {alias} (#{idx+1}/{total}) ===", flush=True)
+    io_futures: List[Any] = []  # 施設内で積んだ書き込みは最後にまとめて待つ
+    try:
+        if idx == 0 or not allow_back:
+            print("[INFO] run full sequence", flush=True)
+            navigate_to_facility(page, facility)
+        else:
+            print("[INFO] trying back from month-view to facility/build list ...", flush=True)
+            ok_back = back_to_facility_list(page)
+            if not ok_back:
+                print("[WARN] back failed; fallback to full sequence", flush=True)
+                navigate_to_facility(page, facility)
+            else:
+                print("[INFO] back succeeded; now selecting next facility by BldCd", flush=True)
+                code = facility.get("facility_code") or FACILITY_ALIAS_TO_BLDCD.get(alias, "")
+                ok_sel = select_facility_by_code(page, code, config)
+                if not ok_sel:
+                    print(f"[WARN] BldCd click failed (code={code}); fallback to full sequence", flush=True)
+                    navigate_to_facility(page, facility)
+                else:
+                    print("[INFO] BldCd click succeeded; applying post-steps (if any)", flush=True)
+                    apply_post_facility_steps(page, facility)
+                    wait_calendar_ready(page, facility)
+
+        # ===== ここからは従来の保存・通知・月遷移 =====
+        with time_section("get_current_year_month_text"):
+            month_text = get_current_year_month_text(page) or "unknown"
+        cal_root = _calendar_root_cached(page, month_text or "予約カレンダー", facility)
+        short = alias
+        outdir = facility_month_dir(short or 'unknown_facility', month_text)
+
+        # 月表示サマリ＆改善日（HTML は 1 回取得して集計と保存で共有する）
+        try:
+            cal_html = _fetch_calendar_html(cal_root)
+        except Exception:
+            cal_html = None
+        summary, details = summarize_vacancies(page, cal_root, config, html=cal_html)
+        print(f"[SUMMARY] current: ◯={summary['○']} △={summary['△']} ×={summary['×']} 未判定={summary['未判定']}", flush=True)
+        _log_capture(facility.get('name',''), month_text, summary)
+        prev_payload = load_last_payload(outdir)
+        prev_details = (prev_payload or {}).get("details") or []
+        improved_days_head = compute_improved_days(prev_details, details)
+        print(f"[IMPROVED] days={improved_days_head}", flush=True)
+
+        # 保存
+        changed = summaries_changed((prev_payload or {}).get("summary"), summary)
+        latest_html, latest_png, ts_html, ts_png = save_calendar_assets(cal_root, outdir, save_ts=changed, html=cal_html)
+        fac_ret = facility.get("retention") or {}
+        max_png = int(fac_ret.get("max_files_per_month_png", max_png_default))
+        max_html = int(fac_ret.get("max_files_per_month_html", max_html_default))
+        rotate_snapshot_files(outdir, max_png=max_png, max_html=max_html)
+        payload = {
+            "month": month_text, "facility": facility.get('name',''),
+            "summary": summary, "details": details,
+            "run_at": jst_now().strftime("%Y-%m-%d %H:%M:%S JST")
+        }
+        with time_section("write status_counts.json"):
+            io_futures.append(_IO_POOL.submit(
+                safe_write_text, outdir / "status_counts.json", _json_dumps_pretty(payload), False))
+        print(f"[INFO] saved: {facility.get('name','')} - {month_text} latest=({latest_html.name},{latest_png.name})", flush=True)
+        if ts_html and ts_png:
+            print(f"[INFO] saved (timestamped): {ts_html.name}, {ts_png.name}", flush=True)
+
+        # ★（1～5）改善日が尽きるまで：クリック→時間帯「空き」検出→月に戻る
+        time_lines = build_time_increase_lines(page, cal_root, short, month_text, prev_details, details, config)
+        if time_lines:
+            send_aggregate_lines(DISCORD_WEBHOOK_URL, short, month_text, time_lines)
+
+        # === 6. 月遷移（必ず月表示でのみ） ===
+        shifts = facility.get("month_shifts", [0,1])
+        shifts = sorted(set(int(s) for s in shifts if isinstance(s,(int,float))))
+        if 0 not in shifts: shifts.insert(0,0)
+        max_shift = max(shifts)
+        prev_month_text = month_text
+        for step in range(1, max_shift + 1):
+            ok = click_next_month(page, calendar_root=cal_root, prev_month_text=prev_month_text,
+                                  wait_timeout_ms=20000, facility=facility)
+            if not ok:
+                dbg = OUTPUT_ROOT / "_debug"; safe_mkdir(dbg)
+                with time_section(f"screenshot fail step={step}"):
+                    page.screenshot(path=str(dbg / f"failed_next_month_step{step}_{short}.png"))
+                print(f"[WARN] next-month click failed at step={step}", flush=True)
+                break
+            with time_section(f"get_current_month_text(step={step})"):
+                month_text2 = (ok if isinstance(ok, str) else None) \
+                    or get_current_year_month_text(page) or f"shift_{step}"
+                print(f"[INFO] month(step={step}): {month_text2}", flush=True)
+            cal_root2 = _calendar_root_cached(page, month_text2 or "予約カレンダー", facility)
+            outdir2 = facility_month_dir(short or 'unknown_facility', month_text2)
+            print(f"[INFO] outdir(step={step})={outdir2}", flush=True)
+
+            if step in shifts:
+                try:
+                    cal_html2 = _fetch_calendar_html(cal_root2)
+                except Exception:
+                    cal_html2 = None
+                summary2, details2 = summarize_vacancies(page, cal_root2, config, html=cal_html2)
+                print(f"[SUMMARY] current: ◯={summary2['○']} △={summary2['△']} ×={summary2['×']} 未判定={summary2['未判定']}", flush=True)
+                _log_capture(facility.get('name',''), month_text2, summary2)
+
+                prev_payload2 = load_last_payload(outdir2)
+                prev_details2 = (prev_payload2 or {}).get("details") or []
+                improved_days2 = compute_improved_days(prev_details2, details2)
+                print(f"[IMPROVED] days={improved_days2}", flush=True)
+
+                changed2 = summaries_changed((prev_payload2 or {}).get("summary"), summary2)
+                latest_html2, latest_png2, ts_html2, ts_png2 = save_calendar_assets(cal_root2, outdir2, save_ts=changed2, html=cal_html2)
+                rotate_snapshot_files(outdir2, max_png=max_png, max_html=max_html)
+                payload2 = {
+                    "month": month_text2, "facility": facility.get('name',''),
+                    "summary": summary2, "details": details2,
+                    "run_at": jst_now().strftime("%Y-%m-%d %H:%M:%S JST")
+                }
+                with time_section("write status_counts.json (step)"):
+                    io_futures.append(_IO_POOL.submit(
+                        safe_write_text, outdir2 / "status_counts.json", _json_dumps_pretty(payload2), False))
+                print(f"[INFO] saved: {facility.get('name','')} - {month_text2} latest=({latest_html2.name},{latest_png2.name})", flush=True)
+                if ts_html2 and ts_png2:
+                    print(f"[INFO] saved (timestamped): {ts_html2.name}, {ts_png2.name}", flush=True)
+
+                # ★（1～5）翌月以降も同様に
+                time_lines2 = build_time_increase_lines(page, cal_root2, short, month_text2, prev_details2, details2, config)
+                if time_lines2:
+                    send_aggregate_lines(DISCORD_WEBHOOK_URL, short, month_text2, time_lines2)
+
+            cal_root = cal_root2
+            prev_month_text = month_text2
+
+    except Exception as e:
+        dbg = OUTPUT_ROOT / "_debug"; safe_mkdir(dbg)
+        shot = dbg / f"exception_{alias}_{int(time.time())}.png"
+        try: page.screenshot(path=str(shot))
+        except Exception: pass
+        safe_write_text(dbg / f"exception_{alias}_{int(time.time())}.html", page.inner_html("body"))
+        print(f"[ERROR] run_monitor: 施設処理中に例外: {e} (debug: {shot})", flush=True)
+    finally:
+        for f in io_futures:
+            try:
+                f.result()
+            except Exception as e:
+                print(f"[WARN] status_counts write failed: {e}", flush=True)
+
+
 def run_monitor():
     print("[INFO] run_monitor: start", flush=True)
     print(f"[INFO] BASE_DIR={BASE_DIR} cwd={Path.cwd()} OUTPUT_ROOT={OUTPUT_ROOT}", flush=True)
@@ -1459,142 +1639,102 @@ def run_monitor():
     facilities = config.get("facilities", [])
     if not facilities:
         print("[WARN] config['facilities'] が空です。", flush=True); return
+    # キーワード正規表現をここで一度だけウォームアップ（最初のセル判定を軽くする）
+    _compiled_keyword_res(config.get("status_patterns") or {})
+    _compiled_keyword_res(config.get("css_class_patterns") or {})
 
     cfg_ret = (config.get("retention") or {})
     max_png_default = int(cfg_ret.get("max_files_per_month_png", 50))
     max_html_default = int(cfg_ret.get("max_files_per_month_html", 50))
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
+    if MONITOR_PARALLEL > 1 and len(facilities) > 1:
+        _run_monitor_parallel(facilities, config, max_png_default, max_html_default)
+        return
 
+    with sync_playwright() as p:
+        persist_dir = os.getenv("PERSIST_DIR", "").strip()
+        if persist_dir:
+            # プロファイルを使い回して cron 起動ごとの cold-start（キャッシュ/クッキー喪失）を軽減
+            context = p.chromium.launch_persistent_context(
+                persist_dir, headless=True, args=_LAUNCH_ARGS)
+            if FAST_ROUTES:
+                enable_fast_routes(context)
+            browser = None
+        else:
+            browser = p.chromium.launch(headless=True, args=_LAUNCH_ARGS)
+            context = _new_context_with_state(browser)
+        page = _new_page(context)
         for idx, facility in enumerate(facilities):
-            alias = FACILITY_TITLE_ALIAS.get(facility.get('name',''), facility.get('name','')) or facility.get('name','')
-            print(f"[INFO] === Facility stage begin: {alias} (#{idx+1}/{len(facilities)}) ===", flush=True)
-            try:
-                if idx == 0:
-                    print("[INFO] first facility: run full sequence", flush=True)
-                    navigate_to_facility(page, facility)
-                else:
-                    print("[INFO] trying back from month-view to facility/build list ...", flush=True)
-                    ok_back = back_to_facility_list(page)
-                    if not ok_back:
-                        print("[WARN] back failed; fallback to full sequence", flush=True)
-                        navigate_to_facility(page, facility)
-                    else:
-                        print("[INFO] back succeeded; now selecting next facility by BldCd", flush=True)
-                        code = facility.get("facility_code") or FACILITY_ALIAS_TO_BLDCD.get(alias, "")
-                        ok_sel = select_facility_by_code(page, code, config)
-                        if not ok_sel:
-                            print(f"[WARN] BldCd click failed (code={code}); fallback to full sequence", flush=True)
-                            navigate_to_facility(page, facility)
-                        else:
-                            print("[INFO] BldCd click succeeded; applying post-steps (if any)", flush=True)
-                            apply_post_facility_steps(page, facility)
-                            wait_calendar_ready(page, facility)
-
-                # ===== ここからは従来の保存・通知・月遷移 =====
-                with time_section("get_current_year_month_text"):
-                    month_text = get_current_year_month_text(page) or "unknown"
-                cal_root = locate_calendar_root(page, month_text or "予約カレンダー", facility)
-                short = alias
-                outdir = facility_month_dir(short or 'unknown_facility', month_text)
-
-                # 月表示サマリ＆改善日
-                summary, details = summarize_vacancies(page, cal_root, config)
-                print(f"[SUMMARY] current: ◯={summary['○']} △={summary['△']} ×={summary['×']} 未判定={summary['未判定']}", flush=True)
-                prev_payload = load_last_payload(outdir)
-                prev_details = (prev_payload or {}).get("details") or []
-                improved_days_head = compute_improved_days(prev_details, details)
-                print(f"[IMPROVED] days={improved_days_head}", flush=True)
-
-                # 保存
-                changed = summaries_changed((prev_payload or {}).get("summary"), summary)
-                latest_html, latest_png, ts_html, ts_png = save_calendar_assets(cal_root, outdir, save_ts=changed)
-                fac_ret = facility.get("retention") or {}
-                max_png = int(fac_ret.get("max_files_per_month_png", max_png_default))
-                max_html = int(fac_ret.get("max_files_per_month_html", max_html_default))
-                rotate_snapshot_files(outdir, max_png=max_png, max_html=max_html)
-                payload = {
-                    "month": month_text, "facility": facility.get('name',''),
-                    "summary": summary, "details": details,
-                    "run_at": jst_now().strftime("%Y-%m-%d %H:%M:%S JST")
-                }
-                with time_section("write status_counts.json"):
-                    safe_write_text(outdir / "status_counts.json", json.dumps(payload, ensure_ascii=False, indent=2))
-                print(f"[INFO] saved: {facility.get('name','')} - {month_text} latest=({latest_html.name},{latest_png.name})", flush=True)
-                if ts_html and ts_png:
-                    print(f"[INFO] saved (timestamped): {ts_html.name}, {ts_png.name}", flush=True)
-
-                # ★（1～5）改善日が尽きるまで：クリック→時間帯「空き」検出→月に戻る
-                time_lines = build_time_increase_lines(page, cal_root, short, month_text, prev_details, details, config)
-                if time_lines:
-                    send_aggregate_lines(DISCORD_WEBHOOK_URL, short, month_text, time_lines)
-
-                # === 6. 月遷移（必ず月表示でのみ） ===
-                shifts = facility.get("month_shifts", [0,1])
-                shifts = sorted(set(int(s) for s in shifts if isinstance(s,(int,float))))
-                if 0 not in shifts: shifts.insert(0,0)
-                max_shift = max(shifts)
-                prev_month_text = month_text
-                for step in range(1, max_shift + 1):
-                    ok = click_next_month(page, calendar_root=cal_root, prev_month_text=prev_month_text,
-                                          wait_timeout_ms=20000, facility=facility)
-                    if not ok:
-                        dbg = OUTPUT_ROOT / "_debug"; safe_mkdir(dbg)
-                        with time_section(f"screenshot fail step={step}"):
-                            page.screenshot(path=str(dbg / f"failed_next_month_step{step}_{short}.png"))
-                        print(f"[WARN] next-month click failed at step={step}", flush=True)
-                        break
-                    with time_section(f"get_current_month_text(step={step})"):
-                        month_text2 = get_current_year_month_text(page) or f"shift_{step}"
-                        print(f"[INFO] month(step={step}): {month_text2}", flush=True)
-                    cal_root2 = locate_calendar_root(page, month_text2 or "予約カレンダー", facility)
-                    outdir2 = facility_month_dir(short or 'unknown_facility', month_text2)
-                    print(f"[INFO] outdir(step={step})={outdir2}", flush=True)
-
-                    if step in shifts:
-                        summary2, details2 = summarize_vacancies(page, cal_root2, config)
-                        print(f"[SUMMARY] current: ◯={summary2['○']} △={summary2['△']} ×={summary2['×']} 未判定={summary2['未判定']}", flush=True)
-
-                        prev_payload2 = load_last_payload(outdir2)
-                        prev_details2 = (prev_payload2 or {}).get("details") or []
-                        improved_days2 = compute_improved_days(prev_details2, details2)
-                        print(f"[IMPROVED] days={improved_days2}", flush=True)
-
-                        changed2 = summaries_changed((prev_payload2 or {}).get("summary"), summary2)
-                        latest_html2, latest_png2, ts_html2, ts_png2 = save_calendar_assets(cal_root2, outdir2, save_ts=changed2)
-                        rotate_snapshot_files(outdir2, max_png=max_png, max_html=max_html)
-                        payload2 = {
-                            "month": month_text2, "facility": facility.get('name',''),
-                            "summary": summary2, "details": details2,
-                            "run_at": jst_now().strftime("%Y-%m-%d %H:%M:%S JST")
-                        }
-                        with time_section("write status_counts.json (step)"):
-                            safe_write_text(outdir2 / "status_counts.json", json.dumps(payload2, ensure_ascii=False, indent=2))
-                        print(f"[INFO] saved: {facility.get('name','')} - {month_text2} latest=({latest_html2.name},{latest_png2.name})", flush=True)
-                        if ts_html2 and ts_png2:
-                            print(f"[INFO] saved (timestamped): {ts_html2.name}, {ts_png2.name}", flush=True)
-
-                        # ★（1～5）翌月以降も同様に
-                        time_lines2 = build_time_increase_lines(page, cal_root2, short, month_text2, prev_details2, details2, config)
-                        if time_lines2:
-                            send_aggregate_lines(DISCORD_WEBHOOK_URL, short, month_text2, time_lines2)
-
-                    cal_root = cal_root2
-                    prev_month_text = month_text2
+            _process_one_facility(page, facility, config, idx, len(facilities),
+                                  max_png_default, max_html_default)
+        _save_storage_state(context)
+        context.close()
+        if browser is not None:
+            browser.close()
+    _flush_capture_log()
+
+
+def _new_context_with_state(browser):
+    """STORAGE_STATE_PATH があれば前回 run の cookie/localStorage を引き継ぐ。"""
+    context = None
+    if STORAGE_STATE_PATH and Path(STORAGE_STATE_PATH).exists():
+        try:
+            context = browser.new_context(storage_state=STORAGE_STATE_PATH, service_workers="block")
+        except Exception as e:
+            print(f"[WARN] storage_state load failed: {e}", flush=True)
+    if context is None:
+        context = browser.new_context(service_workers="block")
+    if FAST_ROUTES:
+        enable_fast_routes(context)
+    return context
 
-            except Exception as e:
-                dbg = OUTPUT_ROOT / "_debug"; safe_mkdir(dbg)
-                shot = dbg / f"exception_{alias}_{int(time.time())}.png"
-                try: page.screenshot(path=str(shot))
-                except Exception: pass
-                safe_write_text(dbg / f"exception_{alias}_{int(time.time())}.html", page.inner_html("body"))
-                print(f"[ERROR] run_monitor: 施設処理中に例外: {e} (debug: {shot})", flush=True)
-                continue
 
-        browser.close()
+def _new_page(context):
+    """ページ生成と描画系の軽量化設定をまとめる。"""
+    page = context.new_page()
+    try:
+        # CSS トランジションを抑止して月遷移後の余計な再描画を減らす
+        page.emulate_media(reduced_motion="reduce")
+    except Exception:
+        pass
+    return page
+
+
+def _save_storage_state(context) -> None:
+    if not STORAGE_STATE_PATH:
+        return
+    try:
+        context.storage_state(path=STORAGE_STATE_PATH)
+        print(f"[INFO] storage_state saved: {STORAGE_STATE_PATH}", flush=True)
+    except Exception as e:
+        print(f"[WARN] storage_state save failed: {e}", flush=True)
+
+
+def _run_monitor_parallel(facilities: List[Dict[str, Any]], config: Dict[str, Any],
+                          max_png_default: int, max_html_default: int) -> None:
+    """施設単位の並列巡回（MONITOR_PARALLEL>1 のとき）。
+
+    sync_playwright はスレッド間で共有できないため、ワーカーごとに
+    Playwright／ブラウザを起動する。戻る操作による施設切替は使えないので
+    各施設ともフル遷移（allow_back=False）で処理する。
+    """
+    workers = min(MONITOR_PARALLEL, len(facilities))
+    print(f"[INFO] parallel mode: {workers} workers for {len(facilities)} facilities", flush=True)
+
+    def _worker(pair):
+        idx, facility = pair
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True, args=_LAUNCH_ARGS)
+            try:
+                page = _new_page(_new_context_with_state(browser))
+                _process_one_facility(page, facility, config, idx, len(facilities),
+                                      max_png_default, max_html_default, allow_back=False)
+            finally:
+                browser.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        list(ex.map(_worker, enumerate(facilities)))
+    _flush_capture_log()
 
 def main():
     import argparse
@@ -1618,7 +1758,7 @@ def main():
             print(f"[WARN] facility '{args.facility}' not found in config.json", flush=True); sys.exit(0)
         cfg["facilities"] = targets
         tmp = BASE_DIR / "config.temp.json"
-        tmp.write_text(json.dumps(cfg, ensure_ascii=False, indent=2), "utf-8")
+        tmp.write_text(_json_dumps_pretty(cfg), "utf-8")
         global CONFIG_PATH; CONFIG_PATH = tmp
 
     run_monitor()